@@ -1,49 +1,55 @@
 import os
 import uuid
 import random
-from typing import Dict, Any, List
+import time
+import asyncio
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple
 from datetime import datetime
 from dotenv import load_dotenv
 
 from backend.agents.base import BaseAgent
-from backend.models.messages import AgentMessage
+from backend.models.messages import AgentMessage, AgentTask, WorkflowState
 from backend.agents.workers import ClinicalAgent, PatentAgent, MarketAgent, RegulatoryAgent, DocAgent, SearchAgent
+from backend.agents.router import IntentRouter, DEFAULT_HANDLER
+from backend.agents.scheduler import WorkflowScheduler, agent_runner
+from backend.inference.comparison import MoleculeComparator
+from backend.inference.scoring import EvidenceScorer
+from backend.tools.sessions import SessionDocumentStore
+from backend.safety.fact_checker import FactChecker
+from backend.safety.risk_detector import RiskDetector
+from backend.safety.audit_logger import AuditLogger, audit_logger as default_audit_logger
+from backend.monitoring.metrics import HANDLER_DURATION, HANDLER_REQUESTS, WORKER_DURATION, WORKER_ERRORS
+from backend.monitoring.tracing import tracer
 
 load_dotenv()
 
+# Per-worker deadline (seconds) for fan-out; late workers are reported as partial results
+WORKER_TIMEOUT = float(os.getenv("WORKER_TIMEOUT", "5.0"))
+
+# Workers whose metadata feeds the evidence score
+SCORED_WORKERS = {"clinical", "patent", "market"}
+
 # --- Mock Classes for Missing Tools ---
-class EvidenceScorer:
-    def score(self, data): return 85
 class ReportGenerator:
     def generate_pdf(self, data): return "/reports/analysis_report.pdf"
-class MoleculeComparator:
-    def compare(self, candidates): 
-        return {
-            "summary": "Metformin shows higher repurposing potential due to safety profile.",
-            "insights": ["Patent expired", "High market demand"]
-        }
 class HypothesisGenerator:
     def generate(self):
         return [{"drug": "Metformin", "target": "Aging", "rationale": "mTOR inhibition", "confidence": 90}]
 class CausalReasoner:
     def refine_query(self, query): return query
-class FactChecker:
-    pass
-class AuditLogger:
-    def log_event(self, source, event, data): pass
-class RiskDetector:
-    pass
 
 # --- Master Agent ---
 class MasterAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, sessions: Optional[SessionDocumentStore] = None, audit_logger: Optional[AuditLogger] = None):
         super().__init__(name="Master Agent", role="Orchestrator")
+        # Per-session indexes of uploaded documents, searched by DocAgent
+        self.sessions = sessions or SessionDocumentStore()
         self.workers = {
             "clinical": ClinicalAgent(),
             "patent": PatentAgent(),
             "market": MarketAgent(),
             "regulatory": RegulatoryAgent(),
-            "doc": DocAgent(),
+            "doc": DocAgent(self.sessions),
             "search": SearchAgent()
         }
         self.scorer = EvidenceScorer()
@@ -51,17 +57,21 @@ class MasterAgent(BaseAgent):
         self.comparator = MoleculeComparator()
         self.hypothesis_gen = HypothesisGenerator()
         self.reasoner = CausalReasoner()
+        self.router = IntentRouter()
         
         # Safety & Compliance
-        self.fact_checker = FactChecker()
-        self.audit_logger = AuditLogger()
-        self.risk_detector = RiskDetector()
-        
-        # Memory
-        self.chat_history = []
+        self.fact_checker = FactChecker.from_env()
+        # Writes in the background; logging an event only enqueues it
+        self.audit_logger = audit_logger or default_audit_logger
+        self.risk_detector = RiskDetector.from_env()
+
+        # NOTE: A single MasterAgent is shared by every request (see the
+        # lifespan handler in backend/main.py), so no per-request state may be
+        # stored on self. Conversation memory is passed in via `history` and
+        # uploaded documents are looked up by `session_id`.
 
     async def process(self, message: AgentMessage) -> AgentMessage:
-        response = await self.process_query(message.content)
+        response = await self.process_query(message.content, session_id=(message.metadata or {}).get("session_id"))
         return AgentMessage(
             id=response["id"],
             sender=self.name,
@@ -71,120 +81,231 @@ class MasterAgent(BaseAgent):
             metadata=response.get("metadata", {})
         )
 
-    async def process_query(self, query: str) -> Dict[str, Any]:
+    async def process_query(self, query: str, history: Optional[List[Dict[str, Any]]] = None,
+                            session_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Routes a query to the matching handler. `history` is the caller-owned
+        conversation memory for this chat; it is appended to, never shared.
+        `session_id` selects the documents uploaded in this chat session.
+        """
+        response: Dict[str, Any] = {}
+        async for event in self.stream_query(query, history=history, session_id=session_id):
+            if event["type"] == "response":
+                response = event["data"]
+        return response
+
+    async def stream_query(self, query: str, history: Optional[List[Dict[str, Any]]] = None,
+                           session_id: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Same as process_query, but yields progress events as they happen:
+        "route" once routing is decided, "agent" (or "agent_failed") as each
+        worker finishes, "score" whenever the evidence score changes, and a
+        final "response" carrying the full process_query result. Each event is
+        {"type", "content", "data"}, where "content" is a one-line status.
+        """
+        if history is None:
+            history = []
         timestamp = datetime.now().strftime("%I:%M %p")
-        
-        # Audit Log: Incoming Query
-        self.audit_logger.log_event(self.name, "received_query", {"query": query})
-        
-        # Auto-Correction: Refine Query
-        refined_query = self.reasoner.refine_query(query)
-        query_lower = refined_query.lower()
-        
-        # 1. Intent Recognition & Routing
-        if "compare" in query_lower:
-            return await self._handle_comparison(refined_query, timestamp)
-        elif "hypothesis" in query_lower or "propose" in query_lower:
-            return await self._handle_hypothesis(refined_query, timestamp)
-        elif "report" in query_lower:
-            return await self._handle_reporting(refined_query, timestamp)
-        elif any(x in query_lower for x in ["safety", "toxicity", "side effect", "adverse"]):
-            return await self._handle_safety_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["mechanism", "how it works", "moa", "pathway"]):
-            return await self._handle_mechanism_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["clinical", "trial", "phase"]):
-            return await self._handle_clinical_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["market", "sales", "revenue", "competition"]):
-            return await self._handle_market_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["regulatory", "approval", "fda", "ema", "orphan"]):
-            return await self._handle_regulatory_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["dosage", "dose", "formulation", "route", "pill"]):
-            return await self._handle_dosage_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["patent", "expiry", "litigation", "ip"]):
-            return await self._handle_ip_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["manufacturing", "cmc", "synthesis", "impurity", "stability"]):
-            return await self._handle_manufacturing_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["reimbursement", "insurance", "pricing", "payer", "coverage"]):
-            return await self._handle_reimbursement_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["combination", "synergy", "drug-drug", "interaction"]):
-            return await self._handle_combination_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["competitor", "rival", "landscape", "market share"]):
-            return await self._handle_competitor_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["demographics", "patient", "population", "epidemiology"]):
-            return await self._handle_demographics_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["supply chain", "logistics", "sourcing", "vendor"]):
-            return await self._handle_supply_chain_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["global market", "worldwide sales", "international trends"]):
-            return await self._handle_global_market_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["china", "japan", "eu", "nmpa", "pmda", "tga", "regional"]):
-            return await self._handle_regional_regulatory_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["global trials", "multi-regional", "diversity", "global sites"]):
-            return await self._handle_global_clinical_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["rare disease", "orphan", "genetic", "mutation"]):
-            return await self._handle_rare_disease_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["cancer", "oncology", "tumor", "biomarker", "metastasis"]):
-            return await self._handle_oncology_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["infectious", "virus", "bacteria", "pandemic", "antimicrobial"]):
-            return await self._handle_infectious_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["chronic", "diabetes", "cardiovascular", "alzheimer", "neurodegenerative"]):
-            return await self._handle_chronic_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["tropical", "malaria", "dengue", "neglected", "parasitic"]):
-            return await self._handle_tropical_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["autoimmune", "rheumatoid", "lupus", "inflammation", "immunology"]):
-            return await self._handle_autoimmune_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["mental health", "depression", "anxiety", "schizophrenia", "psychiatry"]):
-            return await self._handle_mental_health_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["geriatric", "aging", "elderly", "sarcopenia", "frailty"]):
-            return await self._handle_geriatric_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["pediatric", "child", "infant", "juvenile"]):
-            return await self._handle_pediatric_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["women's health", "fertility", "maternal", "menopause", "pcos"]):
-            return await self._handle_womens_health_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["precision medicine", "genomics", "pgx", "personalized", "sequencing"]):
-            return await self._handle_precision_medicine_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["digital therapeutic", "dtx", "software as a medical device", "samd", "app"]):
-            return await self._handle_digital_therapeutics_query(refined_query, timestamp)
-        elif any(x in query_lower for x in ["hello", "hi", "help", "hey"]):
-            return await self._handle_greeting(refined_query, timestamp)
-        
-        # Default: Standard Analysis Workflow
-        return await self._handle_standard_analysis(refined_query, timestamp)
 
-    async def _handle_standard_analysis(self, query: str, timestamp: str) -> Dict[str, Any]:
+        # Join the caller's trace (e.g. the HTTP request's) or start one. A
+        # generator can't hold a `with` block across yields, so spans here are
+        # started and ended explicitly.
+        outer = tracer.current()
+        if outer is None:
+            span = tracer.start_trace("process_query", query_chars=len(query))
+        else:
+            span = tracer.start_span("process_query", query_chars=len(query))
+        trace_id = (span or outer).trace_id
+        handler_span = None
+        try:
+            # Audit Log: Incoming Query
+            await self.audit_logger.alog_event(self.name, "received_query",
+                                               {"query": query, "session_id": session_id, "trace_id": trace_id})
+            
+            # Auto-Correction: Refine Query
+            refined_query = self.reasoner.refine_query(query)
+
+            # 1. Intent Recognition & Routing (single pass, first-match priority)
+            route = self.router.route(refined_query)
+            route_info = {"handler": route.handler, "keywords": route.keywords}
+            HANDLER_REQUESTS.inc(route.handler)
+            started = time.perf_counter()
+            handler_span = tracer.start_span(route.handler, parent=span)
+            yield {"type": "route", "content": f"Routing to {route.handler[len('_handle_'):].replace('_', ' ')}", "data": route_info}
+
+            if route.handler == DEFAULT_HANDLER:
+                # Default: Standard Analysis Workflow, streamed worker by worker
+                response: Dict[str, Any] = {}
+                async for event in self._stream_standard_analysis(refined_query, timestamp, history, session_id, handler_span):
+                    if event["type"] == "response":
+                        response = event["data"]
+                    else:
+                        yield event
+            else:
+                with tracer.activate(handler_span):
+                    response = await getattr(self, route.handler)(refined_query, timestamp)
+
+            metadata = response.setdefault("metadata", {})
+            metadata["route"] = route_info
+            metadata["trace_id"] = trace_id
+            HANDLER_DURATION.observe(time.perf_counter() - started, route.handler)
+        except BaseException as e:
+            tracer.end_span(handler_span, e)
+            tracer.end_span(span, e)
+            raise
+        tracer.end_span(handler_span)
+        tracer.end_span(span)
+        yield {"type": "response", "content": "Analysis complete", "data": response}
+
+    async def _iter_workers(self, worker_names: List[str], query: str, timeout: float = WORKER_TIMEOUT,
+                            session_id: Optional[str] = None, parent_span=None) -> AsyncIterator[Tuple[str, Optional[AgentMessage]]]:
+        """
+        Sends `query` to every named worker concurrently, each bounded by
+        `timeout` seconds, and yields (name, response) in completion order.
+        Workers that time out or fail are yielded as (name, None). Workers
+        still running are cancelled if the consumer stops early. Worker spans
+        are children of `parent_span` (default: the current span).
+        """
+        async def call(name: str) -> Tuple[str, Optional[AgentMessage]]:
+            worker = self.workers[name]
+            task = AgentMessage(
+                id=str(uuid.uuid4()),
+                sender=self.name,
+                recipient=worker.name,
+                content=query,
+                message_type="task",
+                metadata={"session_id": session_id} if session_id else {}
+            )
+            start = time.perf_counter()
+            with tracer.span(f"agent.{name}", agent=worker.name) as span:
+                try:
+                    response = await asyncio.wait_for(worker.process(task), timeout)
+                    await self.audit_logger.alog_event(worker.name, "task_completed", {"query": query, "session_id": session_id})
+                    return name, response
+                except Exception as e:
+                    WORKER_ERRORS.inc(name)
+                    if span is not None:
+                        span.status, span.error = "error", f"{type(e).__name__}: {e}"
+                    await self.audit_logger.alog_event(worker.name, "task_failed",
+                                                       {"query": query, "session_id": session_id, "error": f"{type(e).__name__}: {e}"})
+                    return name, None
+                finally:
+                    WORKER_DURATION.observe(time.perf_counter() - start, name)
+
+        # Tasks copy the current context when created, which parents their spans
+        with tracer.activate(parent_span):
+            pending = [asyncio.ensure_future(call(name)) for name in worker_names]
+        try:
+            for next_done in asyncio.as_completed(pending):
+                yield await next_done
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _score_evidence(self, evidence: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Scores the metadata returned by the clinical/patent/market workers, keyed by worker name."""
+        clinical = evidence.get("clinical", {})
+        patent = evidence.get("patent", {})
+        market = evidence.get("market", {})
+        return self.scorer.calculate_score({
+            "clinical_count": clinical.get("count", 0),
+            "patent_freedom": patent.get("freedom_to_operate", "Low"),
+            "market_cagr": market.get("cagr", "0"),
+        })
+
+    def _synthesize(self, responses: Dict[str, AgentMessage], failed: List[str], score: Dict[str, Any]) -> str:
+        """Builds the analysis summary from the workers' structured metadata."""
+        findings = []
+        if "clinical" in responses:
+            data = responses["clinical"].metadata
+            findings.append(f"**Clinical Agent**: {data['count']} relevant studies found via {data['source']}. Key biomarker: {data['biomarker']}.")
+        if "patent" in responses:
+            data = responses["patent"].metadata
+            findings.append(f"**Patent Agent**: {data['count']} active patents ({data['source']}), expiring {', '.join(data['expiry_dates'])}. Freedom to operate: {data['freedom_to_operate']}.")
+        if "market" in responses:
+            data = responses["market"].metadata
+            findings.append(f"**Market Agent**: Global CAGR {data['cagr']}, estimated peak sales {data['peak_sales']}. Key competitors: {', '.join(data['competitors'])}.")
+        if "regulatory" in responses:
+            data = responses["regulatory"].metadata
+            findings.append(f"**Regulatory Agent**: {data['pathway']} pathway with {data['risk_level'].lower()} risk. Precedents: {', '.join(data['precedents'])}.")
+        if "doc" in responses:
+            docs = responses["doc"].metadata["documents"]
+            if docs:
+                top = docs[0]
+                excerpt = top["content"][:300] + ("..." if len(top["content"]) > 300 else "")
+                source = f" from {top['filename']}" if top.get("filename") else ""
+                findings.append(f"**Internal Doc Agent**: {len(docs)} relevant passages{source}. Top match: \"{excerpt}\"")
+
+        text = "**Analysis Complete**\n\n"
+        text += "Based on the analysis from the specialist agents, here are the findings:\n\n"
+        for i, finding in enumerate(findings, 1):
+            text += f"{i}. {finding}\n"
+        if failed:
+            names = ", ".join(self.workers[name].name for name in failed)
+            text += f"\n_Partial results: no response in time from {names}._\n"
+
+        recommendation = {
+            "High": "Proceed with the repurposing candidate.",
+            "Medium": "Proceed with further validation of the weaker evidence areas.",
+            "Low": "Deprioritize until stronger evidence is available.",
+        }[score["confidence_level"]]
+        text += f"\n**Strategic Recommendation**: {recommendation}\n"
+        text += f"**Confidence Score**: {score['total_score']}%\n"
+        text += "**Time Saved**: ~40 hours"
+        return text
+
+    async def _stream_standard_analysis(self, query: str, timestamp: str, history: List[Dict[str, Any]],
+                                        session_id: Optional[str] = None, span=None) -> AsyncIterator[Dict[str, Any]]:
         # Force full agent swarm for demo purposes to ensure "Smart" behavior
         active_workers = ["clinical", "patent", "market", "regulatory"]
+        if self.sessions.has_documents(session_id):
+            # Ground the analysis in the documents uploaded this session
+            active_workers.append("doc")
         
         # Add to history
-        self.chat_history.append({"role": "user", "content": query})
+        history.append({"role": "user", "content": query})
+
+        # Fan out to all workers at once and report each as it lands: the
+        # first event arrives after the fastest worker, and a worker that
+        # misses its deadline only drops its own section.
+        started = time.perf_counter()
+        responses: Dict[str, AgentMessage] = {}
+        failed: List[str] = []
+        async for name, result in self._iter_workers(active_workers, query, session_id=session_id, parent_span=span):
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            agent = self.workers[name].name
+            if result is None:
+                failed.append(name)
+                yield {"type": "agent_failed", "content": f"{agent} did not respond in time",
+                       "data": {"worker": name, "agent": agent, "elapsed_ms": elapsed_ms}}
+                continue
+            responses[name] = result
+            yield {"type": "agent", "content": f"{agent} finished ({elapsed_ms:g} ms)",
+                   "data": {"worker": name, "agent": agent, "elapsed_ms": elapsed_ms,
+                            "message": result.model_dump()}}
+            if name in SCORED_WORKERS:
+                partial = self._score_evidence({n: msg.metadata for n, msg in responses.items()})
+                yield {"type": "score", "content": f"Evidence score so far: {partial['total_score']}%",
+                       "data": {**partial, "partial": not SCORED_WORKERS.issubset(responses)}}
+
+        score = self._score_evidence({name: msg.metadata for name, msg in responses.items()})
+        synthesis_text = self._synthesize(responses, failed, score)
         
-        # Static response to replace Gemini
-        synthesis_text = (
-            "**Analysis Complete**\n\n"
-            "Based on the analysis from the specialist agents, here are the findings:\n\n"
-            "1. **Clinical Agent**: Identified relevant clinical trials with positive outcomes.\n"
-            "2. **Patent Agent**: Confirmed patent expiry and freedom to operate.\n"
-            "3. **Market Agent**: Estimated significant market potential and ROI.\n"
-            "4. **Regulatory Agent**: Outlined a clear approval pathway.\n\n"
-            "**Strategic Recommendation**: Proceed with the repurposing candidate.\n"
-            "**Confidence Score**: 85%\n"
-            "**Time Saved**: ~40 hours"
-        )
-        
-        self.chat_history.append({"role": "assistant", "content": synthesis_text})
+        history.append({"role": "assistant", "content": synthesis_text})
 
-        # Mock metadata for the UI charts (since LLM text is unstructured)
-        # In a full implementation, we'd ask Gemini to return JSON.
-        score = {"total_score": 85, "confidence_level": "High"} 
-        
-        return {
+        yield {"type": "response", "content": "Analysis complete", "data": {
             "id": str(uuid.uuid4()),
             "sender": "master",
             "agent": "Master Agent",
             "text": synthesis_text,
             "timestamp": timestamp,
-            "workflow": active_workers,
-            "metadata": {"score": score}
-        }
+            "workflow": [name for name in active_workers if name in responses],
+            "metadata": {
+                "score": score,
+                "agents": {name: msg.metadata for name, msg in responses.items()},
+                "failed_workers": failed
+            }
+        }}
 
     async def _handle_comparison(self, query: str, timestamp: str) -> Dict[str, Any]:
         # Mocking candidates for demo
@@ -205,7 +326,7 @@ class MasterAgent(BaseAgent):
             "text": text,
             "timestamp": timestamp,
             "workflow": ["comparison_engine"],
-            "metadata": {"confidence_score": 90}
+            "metadata": {"confidence_score": 90, "comparison": result}
         }
 
     async def _handle_hypothesis(self, query: str, timestamp: str) -> Dict[str, Any]:
@@ -224,23 +345,74 @@ class MasterAgent(BaseAgent):
             "metadata": {"confidence_score": 85}
         }
 
+    def _build_report_workflow(self, query: str) -> WorkflowState:
+        """Repurposing report pipeline: evidence workers -> scoring -> report."""
+        return WorkflowState(query=query, tasks=[
+            AgentTask(task_id="clinical", description="Clinical trial evidence", assigned_to="clinical"),
+            AgentTask(task_id="patent", description="IP landscape", assigned_to="patent"),
+            AgentTask(task_id="market", description="Market sizing", assigned_to="market"),
+            AgentTask(task_id="regulatory", description="Regulatory pathway", assigned_to="regulatory"),
+            AgentTask(task_id="scoring", description="Evidence score", assigned_to="scorer",
+                      depends_on=["clinical", "patent", "market"]),
+            AgentTask(task_id="reporting", description="PDF report", assigned_to="reporter",
+                      depends_on=["scoring", "regulatory"]),
+        ])
+
+    async def run_workflow(self, state: WorkflowState) -> WorkflowState:
+        """Executes `state` on the DAG scheduler with this agent's workers and helpers."""
+        async def score(task: AgentTask, inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+            with tracer.span("score_evidence"):
+                return self._score_evidence(inputs)
+
+        async def report(task: AgentTask, inputs: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+            data = {
+                "query": state.query,
+                "summary": "Automated analysis of drug repurposing candidates.",
+                "score": inputs.get("scoring", {}),
+                "agent_responses": {msg.sender: msg.content for msg in state.messages}
+            }
+            with tracer.span("generate_report"):
+                return {"path": self.reporter.generate_pdf(data)}
+
+        async def audit(task: AgentTask):
+            # Same per-agent trail as the fan-out path in _iter_workers
+            worker = self.workers.get(task.assigned_to)
+            agent = worker.name if worker is not None else self.name
+            details = {"query": state.query, "task_id": task.task_id}
+            if task.status == "completed":
+                await self.audit_logger.alog_event(agent, "task_completed", details)
+            else:
+                await self.audit_logger.alog_event(agent, "task_failed", {**details, "error": task.error})
+
+        runners = {name: agent_runner(worker, state.query, self.name, label=name) for name, worker in self.workers.items()}
+        runners["scorer"] = score
+        runners["reporter"] = report
+        return await WorkflowScheduler(runners, task_timeout=WORKER_TIMEOUT, on_task_done=audit).run(state)
+
     async def _handle_reporting(self, query: str, timestamp: str) -> Dict[str, Any]:
-        # Generate a dummy report
-        data = {
-            "query": query,
-            "summary": "Automated analysis of drug repurposing candidates.",
-            "score": {"total_score": 88.5, "confidence_level": "High"},
-            "agent_responses": {"Clinical": "Strong evidence found.", "Patent": "Expired."}
-        }
-        pdf_path = self.reporter.generate_pdf(data)
-        
+        state = await self.run_workflow(self._build_report_workflow(query))
+        tasks = {t.task_id: t for t in state.tasks}
+        report = tasks["reporting"]
+
+        if report.status == "completed":
+            text = f"Report generated successfully. You can download it here: [Download PDF]({report.result['path']})"
+        else:
+            text = f"Report generation failed: {report.error}"
+
         return {
             "id": str(uuid.uuid4()),
             "sender": "master",
             "agent": "Master Agent",
-            "text": f"Report generated successfully. You can download it here: [Download PDF]({pdf_path})",
+            "text": text,
             "timestamp": timestamp,
-            "workflow": ["report_generator"]
+            "workflow": [t.task_id for t in state.tasks if t.status == "completed"],
+            "metadata": {
+                "score": tasks["scoring"].result or {},
+                "tasks": {
+                    t.task_id: {"status": t.status, "started_at": t.started_at, "duration_ms": t.duration_ms, "error": t.error}
+                    for t in state.tasks
+                }
+            }
         }
 
     async def _handle_safety_query(self, query: str, timestamp: str) -> Dict[str, Any]:
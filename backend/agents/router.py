@@ -0,0 +1,85 @@
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from backend.utils.patterns import KeywordMatcher
+
+# Intent routing table, in priority order: when keywords from several routes
+# appear in a query, the route listed first wins. Handlers are MasterAgent
+# method names. Matching is case-insensitive substring matching.
+ROUTES: List[Tuple[str, Tuple[str, ...]]] = [
+    ("_handle_comparison", ("compare",)),
+    ("_handle_hypothesis", ("hypothesis", "propose")),
+    ("_handle_reporting", ("report",)),
+    ("_handle_safety_query", ("safety", "toxicity", "side effect", "adverse")),
+    ("_handle_mechanism_query", ("mechanism", "how it works", "moa", "pathway")),
+    ("_handle_clinical_query", ("clinical", "trial", "phase")),
+    ("_handle_market_query", ("market", "sales", "revenue", "competition")),
+    ("_handle_regulatory_query", ("regulatory", "approval", "fda", "ema", "orphan")),
+    ("_handle_dosage_query", ("dosage", "dose", "formulation", "route", "pill")),
+    ("_handle_ip_query", ("patent", "expiry", "litigation", "ip")),
+    ("_handle_manufacturing_query", ("manufacturing", "cmc", "synthesis", "impurity", "stability")),
+    ("_handle_reimbursement_query", ("reimbursement", "insurance", "pricing", "payer", "coverage")),
+    ("_handle_combination_query", ("combination", "synergy", "drug-drug", "interaction")),
+    ("_handle_competitor_query", ("competitor", "rival", "landscape", "market share")),
+    ("_handle_demographics_query", ("demographics", "patient", "population", "epidemiology")),
+    ("_handle_supply_chain_query", ("supply chain", "logistics", "sourcing", "vendor")),
+    ("_handle_global_market_query", ("global market", "worldwide sales", "international trends")),
+    ("_handle_regional_regulatory_query", ("china", "japan", "eu", "nmpa", "pmda", "tga", "regional")),
+    ("_handle_global_clinical_query", ("global trials", "multi-regional", "diversity", "global sites")),
+    ("_handle_rare_disease_query", ("rare disease", "orphan", "genetic", "mutation")),
+    ("_handle_oncology_query", ("cancer", "oncology", "tumor", "biomarker", "metastasis")),
+    ("_handle_infectious_query", ("infectious", "virus", "bacteria", "pandemic", "antimicrobial")),
+    ("_handle_chronic_query", ("chronic", "diabetes", "cardiovascular", "alzheimer", "neurodegenerative")),
+    ("_handle_tropical_query", ("tropical", "malaria", "dengue", "neglected", "parasitic")),
+    ("_handle_autoimmune_query", ("autoimmune", "rheumatoid", "lupus", "inflammation", "immunology")),
+    ("_handle_mental_health_query", ("mental health", "depression", "anxiety", "schizophrenia", "psychiatry")),
+    ("_handle_geriatric_query", ("geriatric", "aging", "elderly", "sarcopenia", "frailty")),
+    ("_handle_pediatric_query", ("pediatric", "child", "infant", "juvenile")),
+    ("_handle_womens_health_query", ("women's health", "fertility", "maternal", "menopause", "pcos")),
+    ("_handle_precision_medicine_query", ("precision medicine", "genomics", "pgx", "personalized", "sequencing")),
+    ("_handle_digital_therapeutics_query", ("digital therapeutic", "dtx", "software as a medical device", "samd", "app")),
+    ("_handle_greeting", ("hello", "hi", "help", "hey")),
+]
+
+# Not a method: MasterAgent streams this route through
+# _stream_standard_analysis. The name still labels its metrics and spans.
+DEFAULT_HANDLER = "_handle_standard_analysis"
+
+
+class RouteMatch(NamedTuple):
+    handler: str
+    keywords: List[str]  # Keywords of the winning route found in the query
+    fired: Dict[str, List[str]]  # Every route that matched -> its keywords
+
+
+class IntentRouter:
+    """
+    Compiles the routing table into a single keyword automaton once, then
+    resolves each query in one pass while keeping first-match priority order.
+    """
+
+    def __init__(self, routes: Sequence[Tuple[str, Sequence[str]]] = ROUTES, default: str = DEFAULT_HANDLER):
+        self.routes = [(handler, tuple(k.lower() for k in keywords)) for handler, keywords in routes]
+        self.default = default
+
+        # keyword -> priorities of every route that lists it (e.g. "orphan")
+        self._keyword_routes: Dict[str, List[int]] = {}
+        for priority, (_, keywords) in enumerate(self.routes):
+            for keyword in keywords:
+                self._keyword_routes.setdefault(keyword, []).append(priority)
+        self._matcher = KeywordMatcher(self._keyword_routes)
+
+    def route(self, query: str) -> RouteMatch:
+        """Returns the handler for `query` and the keywords that selected it."""
+        fired: Dict[int, List[str]] = {}
+        for _, keyword in self._matcher.finditer(query.lower()):
+            for priority in self._keyword_routes[keyword]:
+                keywords = fired.setdefault(priority, [])
+                if keyword not in keywords:
+                    keywords.append(keyword)
+
+        named = {self.routes[p][0]: kws for p, kws in sorted(fired.items())}
+        if not fired:
+            return RouteMatch(self.default, [], named)
+        winner = min(fired)
+        return RouteMatch(self.routes[winner][0], fired[winner], named)
+
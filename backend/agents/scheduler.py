@@ -0,0 +1,164 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+from backend.agents.base import BaseAgent
+from backend.models.messages import AgentMessage, AgentTask, WorkflowState
+from backend.monitoring.metrics import WORKER_DURATION, WORKER_ERRORS
+from backend.monitoring.tracing import tracer
+
+# A runner executes one task given the results of its dependencies (keyed by
+# task_id). Returning an AgentMessage records it in WorkflowState.messages and
+# uses its metadata as the task result.
+TaskRunner = Callable[[AgentTask, Dict[str, Dict[str, Any]]], Awaitable[Union[Dict[str, Any], AgentMessage]]]
+# Called with each task that ran, once it has completed or failed (status,
+# error, result and timings already set)
+TaskHook = Callable[[AgentTask], Awaitable[None]]
+
+
+def agent_runner(agent: BaseAgent, query: str, sender: str = "Master Agent", label: Optional[str] = None) -> TaskRunner:
+    """Adapts a worker agent into a TaskRunner that sends it `query`. `label` names it in metrics."""
+    label = label or agent.name
+
+    async def run(task: AgentTask, inputs: Dict[str, Dict[str, Any]]) -> AgentMessage:
+        start = time.perf_counter()
+        with tracer.span(f"agent.{label}", agent=agent.name, task_id=task.task_id):
+            try:
+                return await agent.process(AgentMessage(
+                    id=task.task_id,
+                    sender=sender,
+                    recipient=agent.name,
+                    content=query,
+                    message_type="task"
+                ))
+            except Exception:
+                WORKER_ERRORS.inc(label)
+                raise
+            finally:
+                WORKER_DURATION.observe(time.perf_counter() - start, label)
+    return run
+
+
+class WorkflowScheduler:
+    """
+    Executes the tasks of a WorkflowState as a dependency graph on the event
+    loop. Every task whose dependencies have completed is started at once, so
+    independent branches run in parallel and dependents start as soon as their
+    last input arrives. Tasks are dispatched to runners by `assigned_to`.
+    `on_task_done`, if given, is awaited for every task that ran, including
+    ones that failed or timed out; tasks skipped because a dependency failed
+    never ran and are not reported.
+    """
+
+    def __init__(self, runners: Dict[str, TaskRunner], task_timeout: Optional[float] = None,
+                 on_task_done: Optional[TaskHook] = None):
+        self.runners = runners
+        self.task_timeout = task_timeout
+        self.on_task_done = on_task_done
+
+    def validate(self, state: WorkflowState) -> List[str]:
+        """Checks the graph and returns task_ids in a valid execution order."""
+        tasks = {}
+        for task in state.tasks:
+            if task.task_id in tasks:
+                raise ValueError(f"Duplicate task_id '{task.task_id}'")
+            tasks[task.task_id] = task
+
+        for task in state.tasks:
+            if task.assigned_to not in self.runners:
+                raise ValueError(f"No runner registered for '{task.assigned_to}' (task '{task.task_id}')")
+            for dep in task.depends_on:
+                if dep not in tasks:
+                    raise ValueError(f"Task '{task.task_id}' depends on unknown task '{dep}'")
+
+        # Kahn's algorithm: anything left over is part of a cycle
+        dependents = self._dependents(state)
+        remaining = {t.task_id: len(set(t.depends_on)) for t in state.tasks}
+        order = [tid for tid, n in remaining.items() if n == 0]
+        for tid in order:
+            for child_id in dependents[tid]:
+                remaining[child_id] -= 1
+                if remaining[child_id] == 0:
+                    order.append(child_id)
+        if len(order) != len(tasks):
+            cyclic = sorted(set(tasks) - set(order))
+            raise ValueError(f"Dependency cycle between tasks: {', '.join(cyclic)}")
+        return order
+
+    @staticmethod
+    def _dependents(state: WorkflowState) -> Dict[str, List[str]]:
+        dependents: Dict[str, List[str]] = {t.task_id: [] for t in state.tasks}
+        for task in state.tasks:
+            for dep in set(task.depends_on):
+                dependents[dep].append(task.task_id)
+        return dependents
+
+    async def run(self, state: WorkflowState) -> WorkflowState:
+        """Runs every pending task in `state`, updating status, results and timings in place."""
+        self.validate(state)
+        tasks = {t.task_id: t for t in state.tasks}
+        dependents = self._dependents(state)
+        waiting = {
+            t.task_id: sum(1 for dep in set(t.depends_on) if tasks[dep].status != "completed")
+            for t in state.tasks
+        }
+
+        origin = time.perf_counter()
+        running: Dict[asyncio.Task, str] = {}
+
+        def start(task: AgentTask):
+            task.status = "in_progress"
+            task.started_at = round(time.perf_counter() - origin, 6)
+            inputs = {dep: tasks[dep].result or {} for dep in task.depends_on}
+            coro = self.runners[task.assigned_to](task, inputs)
+            if self.task_timeout is not None:
+                coro = asyncio.wait_for(coro, self.task_timeout)
+            running[asyncio.ensure_future(coro)] = task.task_id
+
+        def fail_dependents(task_id: str):
+            for child_id in dependents[task_id]:
+                child = tasks[child_id]
+                if child.status == "pending":
+                    child.status = "failed"
+                    child.error = f"Upstream task '{task_id}' failed"
+                    fail_dependents(child_id)
+
+        for task in state.tasks:
+            if task.status == "failed":
+                fail_dependents(task.task_id)
+        for task in state.tasks:
+            if task.status == "pending" and waiting[task.task_id] == 0:
+                start(task)
+
+        try:
+            while running:
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    task = tasks[running.pop(future)]
+                    task.finished_at = round(time.perf_counter() - origin, 6)
+                    task.duration_ms = round((task.finished_at - task.started_at) * 1000, 3)
+
+                    error = future.exception()
+                    if error is not None:
+                        task.status = "failed"
+                        task.error = "Timed out" if isinstance(error, asyncio.TimeoutError) else str(error) or type(error).__name__
+                        fail_dependents(task.task_id)
+                    else:
+                        result = future.result()
+                        if isinstance(result, AgentMessage):
+                            state.messages.append(result)
+                            result = result.metadata or {}
+                        task.result = result
+                        task.status = "completed"
+                        for child_id in dependents[task.task_id]:
+                            waiting[child_id] -= 1
+                            if waiting[child_id] == 0 and tasks[child_id].status == "pending":
+                                start(tasks[child_id])
+                    if self.on_task_done is not None:
+                        await self.on_task_done(task)
+        finally:
+            # Only reached with work outstanding if the caller was cancelled
+            for future in running:
+                future.cancel()
+
+        return state
@@ -1,10 +1,15 @@
 import asyncio
+import os
 import random
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from backend.agents.base import BaseAgent
 from backend.models.messages import AgentMessage
 from backend.tools.mock_apis import MockTools
 from backend.tools.rag import RAGSystem
+from backend.tools.sessions import SessionDocumentStore
+
+# Passages DocAgent pulls from a session's uploaded documents per query
+DOC_TOP_K = int(os.getenv("DOC_TOP_K", "5"))
 
 class ClinicalAgent(BaseAgent):
     def __init__(self):
@@ -67,11 +72,27 @@ class RegulatoryAgent(BaseAgent):
         )
 
 class DocAgent(BaseAgent):
-    def __init__(self):
+    def __init__(self, sessions: Optional[SessionDocumentStore] = None):
         super().__init__(name="Internal Doc Agent", role="RAG Specialist")
         self.rag = RAGSystem()
+        self.sessions = sessions or SessionDocumentStore()
 
     async def process(self, message: AgentMessage) -> AgentMessage:
+        session_id = (message.metadata or {}).get("session_id")
+        if self.sessions.has_documents(session_id):
+            # Top-k passages from the documents uploaded in this session; BM25
+            # runs in a thread so it never holds up the event loop
+            chunks = await asyncio.to_thread(self.sessions.search, session_id, message.content, DOC_TOP_K)
+            sources = sorted({c["filename"] for c in chunks if c["filename"]})
+            return AgentMessage(
+                id=str(random.randint(10000, 99999)),
+                sender=self.name,
+                recipient=message.sender,
+                content=f"Retrieved {len(chunks)} relevant passages from uploaded documents ({', '.join(sources) or 'untitled'}).",
+                message_type="response",
+                metadata={"documents": chunks, "session_id": session_id, "source": "session"}
+            )
+
         docs = await self.rag.retrieve(message.content)
         summary = " ".join([d['content'] for d in docs])
         return AgentMessage(
@@ -0,0 +1,59 @@
+"""
+Runs the benchmark suite and writes machine-readable results.
+
+Usage (from the repository root):
+    python -m backend.benchmarks [--suite micro|e2e|all] [--quick]
+                                 [--output results.json]
+                                 [--baseline baseline.json] [--tolerance 0.25]
+
+With --baseline, each case is compared on its median per-call time and the
+process exits with status 1 if any case is slower by more than --tolerance.
+"""
+import argparse
+import json
+import sys
+
+from backend.benchmarks import e2e, micro
+from backend.benchmarks.harness import compare, environment, write_results
+from backend.tools import latency
+
+SUITES = {"micro": micro.run, "e2e": e2e.run}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=[*SUITES, "all"], default="all")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs and fewer repetitions")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="earlier results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown as a fraction (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    suites = list(SUITES) if args.suite == "all" else [args.suite]
+    results = {
+        "environment": {**environment(), "quick": args.quick, "suites": suites, "tool_latency": latency.latency_model.name},
+        "benchmarks": {},
+    }
+    for suite in suites:
+        print(f"Running {suite} benchmarks...", file=sys.stderr)
+        results["benchmarks"].update(SUITES[suite](args.quick))
+
+    write_results(results, args.output)
+    for name, stats in results["benchmarks"].items():
+        print(f"{name:<60} p50 {stats['p50_us']:>14.1f} us  p95 {stats['p95_us']:>14.1f} us")
+    print(f"Wrote {args.output}")
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    rows = compare(results, baseline, tolerance=args.tolerance)
+    print(f"\nCompared with {args.baseline} (median per call):")
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        print(f"{row['name']:<60} {row['baseline']:>12.1f} -> {row['current']:>12.1f} us  ({row['ratio']}x){flag}")
+    return 1 if any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
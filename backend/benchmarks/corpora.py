@@ -0,0 +1,101 @@
+"""
+Deterministic synthetic inputs for the benchmarks: free text sprinkled with
+risk keywords and trial/patent identifiers, retrieval documents, comparison
+candidates and multi-page PDFs.
+"""
+import random
+from typing import Any, Dict, List
+
+FILLER = (
+    "the candidate was evaluated in murine models and showed reduced tau "
+    "accumulation with good tolerability across dosing cohorts while the "
+    "sponsor reported biomarker shifts in plasma and cerebrospinal fluid"
+).split()
+
+RISK_TERMS = ["toxic", "adverse event", "side effect", "litigation", "recall", "withdrawn", "lawsuit"]
+
+
+def make_text(words: int, seed: int = 7) -> str:
+    """~`words` words of filler with roughly 1% risk terms and 0.5% NCT/US identifiers."""
+    rng = random.Random(seed)
+    out = []
+    for _ in range(words):
+        roll = rng.random()
+        if roll < 0.01:
+            out.append(rng.choice(RISK_TERMS))
+        elif roll < 0.0125:
+            out.append(f"NCT{rng.randrange(10 ** 8):08d}")
+        elif roll < 0.015:
+            out.append(f"US{rng.randrange(10 ** 6, 10 ** 9)}")
+        else:
+            out.append(rng.choice(FILLER))
+    return " ".join(out)
+
+
+def make_documents(count: int, words: int = 60, seed: int = 11) -> List[Dict[str, Any]]:
+    return [{"id": f"bench{i}", "content": make_text(words, seed + i)} for i in range(count)]
+
+
+def make_candidates(count: int, seed: int = 5) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "name": f"Candidate-{i}",
+            "score": round(rng.uniform(20, 99), 1),
+            "clinical_count": rng.randrange(0, 80),
+            "patent_status": rng.choice(["Expired", "Active"]),
+            "market_potential": f"${rng.uniform(0.1, 9.9):.1f}B",
+        }
+        for i in range(count)
+    ]
+
+
+def make_score_inputs(count: int, seed: int = 3) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            "clinical_count": rng.randrange(0, 80),
+            "patent_freedom": rng.choice(["High", "Medium", "Low"]),
+            "market_cagr": f"{rng.uniform(0, 25):.1f}%",
+        }
+        for _ in range(count)
+    ]
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def make_pdf(pages: int, lines_per_page: int = 40, seed: int = 13) -> bytes:
+    """A minimal uncompressed PDF with `pages` pages of Helvetica text."""
+    objects = [b"", b""]  # catalog and page tree, filled in below
+    page_ids = []
+    font_id = 3
+    objects.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+    for p in range(pages):
+        lines = make_text(lines_per_page * 12, seed + p).split()
+        ops = ["BT /F1 10 Tf 50 780 Td 12 TL"]
+        for i in range(0, len(lines), 12):
+            ops.append(f"({_escape(' '.join(lines[i:i + 12]))}) '")
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_id = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R >> >> >>" % (content_id, font_id)
+        )
+        page_ids.append(len(objects))
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % i for i in page_ids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
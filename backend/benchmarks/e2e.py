@@ -0,0 +1,132 @@
+"""
+End-to-end benchmarks of the HTTP and websocket API, run in-process: the
+FastAPI app is driven through httpx's ASGI transport (and Starlette's test
+client for /ws/chat), so the numbers include routing, validation,
+middleware and serialization but no network. Tool latency uses the "zero"
+profile unless TOOL_LATENCY is set; the deliberate sleep in /api/chat is
+included.
+
+Usage: python -m backend.benchmarks.e2e [--quick]
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict
+
+import httpx
+
+from backend.benchmarks import corpora
+from backend.benchmarks.harness import measure_async, summarize
+from backend.tools.latency import LatencyModel, PRESETS, use_latency_model
+from backend.utils.uploads import UploadSizeLimitMiddleware
+
+CHAT_QUERIES = {
+    "standard": "evaluate metformin repurposing",
+    "routed": "compare metformin and rapamycin",
+}
+
+
+async def _check_upload_limit(app):
+    """A chunked upload (no Content-Length) past the cap must get a 413, not reach the endpoint."""
+    limit = 1024 * 1024
+    limited = UploadSizeLimitMiddleware(app, max_bytes=limit, framing_bytes=0)
+
+    async def body():
+        yield (b'--bench\r\nContent-Disposition: form-data; name="file"; filename="big.pdf"\r\n'
+               b"Content-Type: application/pdf\r\n\r\n")
+        for _ in range(4):
+            yield b"x" * (limit // 2)
+        yield b"\r\n--bench--\r\n"
+
+    transport = httpx.ASGITransport(app=limited)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        response = await client.post("/api/upload", content=body(),
+                                     headers={"content-type": "multipart/form-data; boundary=bench"})
+    assert response.status_code == 413, f"chunked upload over the limit got {response.status_code}: {response.text}"
+
+
+async def _bench_http(app, repeat: int, pdf_pages) -> Dict[str, Any]:
+    results = {}
+    async with app.router.lifespan_context(app):
+        await _check_upload_limit(app)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for label, query in CHAT_QUERIES.items():
+                async def chat():
+                    response = await client.post("/api/chat", json={"message": query})
+                    response.raise_for_status()
+                results[f"e2e.api_chat[{label}]"] = await measure_async(chat, repeat=repeat)
+
+            for pages in pdf_pages:
+                # Distinct bytes per call defeat the extraction cache (cold);
+                # re-sending one file measures the cache-hit path (warm).
+                counter = iter(range(10 ** 6))
+
+                async def upload_cold():
+                    pdf = corpora.make_pdf(pages, seed=next(counter) * 100)
+                    response = await client.post("/api/upload", files={"file": ("bench.pdf", pdf, "application/pdf")})
+                    response.raise_for_status()
+                results[f"e2e.api_upload[pages={pages},cache=cold]"] = await measure_async(upload_cold, repeat=repeat)
+
+                pdf = corpora.make_pdf(pages)
+
+                async def upload_warm():
+                    response = await client.post("/api/upload", files={"file": ("bench.pdf", pdf, "application/pdf")})
+                    response.raise_for_status()
+                results[f"e2e.api_upload[pages={pages},cache=warm]"] = await measure_async(upload_warm, repeat=repeat)
+    return results
+
+
+def _bench_websocket(app, repeat: int) -> Dict[str, Any]:
+    from fastapi.testclient import TestClient
+
+    results = {}
+    with TestClient(app) as client, client.websocket_connect("/ws/chat") as ws:
+        for label, query in CHAT_QUERIES.items():
+            first_event, complete = [], []
+            for _ in range(repeat + 1):
+                start = time.perf_counter()
+                ws.send_text(query)
+                first = None
+                while True:
+                    message = ws.receive_json()
+                    if first is None and message["type"] != "log":
+                        first = time.perf_counter() - start
+                    if message["type"] == "response":
+                        break
+                first_event.append(first)
+                complete.append(time.perf_counter() - start)
+            # Drop the warm-up round
+            results[f"e2e.ws_chat[{label},first_event]"] = summarize(first_event[1:], repeat)
+            results[f"e2e.ws_chat[{label},complete]"] = summarize(complete[1:], repeat)
+    return results
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    repeat = 3 if quick else 10
+    pdf_pages = (1,) if quick else (1, 20)
+    previous = None
+    if "TOOL_LATENCY" not in os.environ:
+        previous = use_latency_model(LatencyModel.from_spec(PRESETS["zero"], name="zero"))
+    with tempfile.TemporaryDirectory() as scratch:
+        # Keep benchmark uploads out of the real caches
+        os.environ["EXTRACTION_CACHE_DIR"] = os.path.join(scratch, "extractions")
+        os.environ["UPLOAD_SPOOL_DIR"] = os.path.join(scratch, "uploads")
+        try:
+            from backend.main import app
+            results = asyncio.run(_bench_http(app, repeat, pdf_pages))
+            results.update(_bench_websocket(app, repeat))
+            return results
+        finally:
+            if previous is not None:
+                use_latency_model(previous)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true", help="fewer repetitions, for CI smoke runs")
+    args = parser.parse_args()
+    print(json.dumps(run(args.quick), indent=2))
@@ -0,0 +1,101 @@
+"""
+Shared timing, result and baseline helpers for the benchmark suite.
+
+Every case is reported under a flat name such as
+"micro.risk_detector[words=10000]" with per-call timings in microseconds,
+so two result files can be compared key by key.
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+def summarize(samples: List[float], calls: int) -> Dict[str, Any]:
+    samples = sorted(samples)
+    return {
+        "calls": calls,
+        "p50_us": round(statistics.median(samples) * 1e6, 3),
+        "p95_us": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1e6, 3),
+        "min_us": round(samples[0] * 1e6, 3),
+        "mean_us": round(statistics.fmean(samples) * 1e6, 3),
+    }
+
+
+def measure(fn: Callable[[], Any], repeat: int = 7, number: Optional[int] = None, budget: float = 0.2) -> Dict[str, Any]:
+    """
+    Times `fn()` in `repeat` samples of `number` calls each and reports the
+    per-call time. When `number` is None it is calibrated so one sample takes
+    roughly `budget` seconds.
+    """
+    fn()  # warm-up
+    if number is None:
+        number, elapsed = 1, 0.0
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            elapsed = time.perf_counter() - start
+            if elapsed >= budget / 4 or number >= 1_000_000:
+                break
+            number *= 4
+        number = max(1, int(number * budget / max(elapsed, 1e-9)))
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return summarize(samples, repeat * number)
+
+
+async def measure_async(fn: Callable[[], Awaitable[Any]], repeat: int = 20) -> Dict[str, Any]:
+    """Times `repeat` sequential awaits of `fn()`, one sample per call."""
+    await fn()  # warm-up
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, repeat)
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def write_results(results: Dict[str, Any], path: str):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], metric: str = "p50_us",
+            tolerance: float = 0.25) -> List[Dict[str, Any]]:
+    """
+    Compares two result files case by case on `metric`. Returns one row per
+    case present in both, flagged as a regression when the current value is
+    more than `tolerance` (a fraction) slower than the baseline.
+    """
+    rows = []
+    for name, now in current["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or metric not in before or metric not in now or not before[metric]:
+            continue
+        ratio = now[metric] / before[metric]
+        rows.append({
+            "name": name,
+            "baseline": before[metric],
+            "current": now[metric],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + tolerance,
+        })
+    return rows
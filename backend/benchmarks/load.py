@@ -0,0 +1,261 @@
+"""
+Open-loop load generator for the chat and upload APIs.
+
+Requests arrive as a Poisson process at --rate per second, independent of
+how fast earlier ones finish, so queueing inside the server shows up as
+latency instead of silently lowering the offered load. Latency is measured
+from each request's scheduled arrival time. The request mix is split across
+/api/chat, /ws/chat and /api/upload; chat queries are built from the
+router's keywords so every _handle_* branch (and the default analysis) is
+exercised, and results are grouped by the handler each response reports in
+metadata.route.
+
+By default the app runs in-process (no sockets, no external services);
+--url targets a running server such as `uvicorn backend.main:app` instead.
+Tool latency follows TOOL_LATENCY as usual (try TOOL_LATENCY=realistic).
+
+Usage: python -m backend.benchmarks.load [--rate 20] [--duration 30]
+           [--mix chat=0.5,ws=0.4,upload=0.1] [--url http://localhost:8000]
+           [--max-inflight 2000] [--output load.json]
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from backend.agents.router import DEFAULT_HANDLER, ROUTES, IntentRouter
+from backend.benchmarks import corpora
+
+ENDPOINTS = ("chat", "ws", "upload")
+SUBJECT = "for metformin in older adults"
+
+
+def build_queries() -> Dict[str, List[str]]:
+    """Queries per handler: one per routing keyword, plus default-handler queries."""
+    router = IntentRouter()
+    queries: Dict[str, List[str]] = defaultdict(list)
+    for handler, keywords in ROUTES:
+        for keyword in keywords:
+            query = f"{keyword} {SUBJECT}"
+            # Keep only queries that actually land on their own handler
+            # (a higher-priority keyword may shadow a lower one).
+            if router.route(query).handler == handler:
+                queries[handler].append(query)
+    queries[DEFAULT_HANDLER] += [f"evaluate repurposing {SUBJECT}", f"analyze {SUBJECT}"]
+    return dict(queries)
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r} in mix; expected {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight)
+    return mix
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class InProcessWebSocket:
+    """Drives one websocket conversation straight through the ASGI app."""
+
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+
+    async def query(self, text: str) -> Dict[str, Any]:
+        inbox: asyncio.Queue = asyncio.Queue()
+        outbox: asyncio.Queue = asyncio.Queue()
+        scope = {
+            "type": "websocket", "asgi": {"version": "3.0"}, "scheme": "ws", "http_version": "1.1",
+            "path": self.path, "raw_path": self.path.encode(), "root_path": "", "query_string": b"",
+            "headers": [(b"host", b"loadgen")], "client": ("127.0.0.1", 0), "server": ("loadgen", 80),
+            "subprotocols": [],
+        }
+        await inbox.put({"type": "websocket.connect"})
+        task = asyncio.create_task(self.app(scope, inbox.get, outbox.put))
+        try:
+            message = await outbox.get()
+            if message["type"] != "websocket.accept":
+                raise RuntimeError(f"websocket rejected: {message}")
+            await inbox.put({"type": "websocket.receive", "text": text})
+            while True:
+                message = await outbox.get()
+                if message["type"] == "websocket.close":
+                    raise RuntimeError("websocket closed before a response")
+                data = json.loads(message["text"])
+                if data["type"] == "response":
+                    return data["data"]
+        finally:
+            await inbox.put({"type": "websocket.disconnect", "code": 1000})
+            await task
+
+
+class LoadGenerator:
+    def __init__(self, client: httpx.AsyncClient, ws_query, rate: float, duration: float,
+                 mix: Dict[str, float], max_inflight: int, seed: Optional[int] = None):
+        self.client = client
+        self.ws_query = ws_query
+        self.rate = rate
+        self.duration = duration
+        self.endpoints = list(mix)
+        self.weights = [mix[name] for name in self.endpoints]
+        self.max_inflight = max_inflight
+        self.rng = random.Random(seed)
+        # Handlers are picked uniformly, then one of their queries
+        self.queries = build_queries()
+        self.handlers = sorted(self.queries)
+        # A small pool of PDFs: repeats exercise the extraction cache
+        self.pdfs = [corpora.make_pdf(2, seed=i * 100) for i in range(8)]
+        self.samples: List[Tuple[str, str, float, bool]] = []  # endpoint, handler, seconds, ok
+        self.inflight = 0
+        self.shed = 0
+
+    async def _chat(self, query: str) -> str:
+        response = await self.client.post("/api/chat", json={"message": query})
+        response.raise_for_status()
+        return response.json()["metadata"]["route"]["handler"]
+
+    async def _ws(self, query: str) -> str:
+        return (await self.ws_query(query))["metadata"]["route"]["handler"]
+
+    async def _upload(self, pdf: bytes) -> str:
+        response = await self.client.post("/api/upload", files={"file": ("load.pdf", pdf, "application/pdf")})
+        response.raise_for_status()
+        return "upload"
+
+    async def _one(self, endpoint: str, scheduled: float):
+        expected = self.rng.choice(self.handlers)
+        query = self.rng.choice(self.queries[expected])
+        handler = "upload" if endpoint == "upload" else expected
+        ok = True
+        try:
+            if endpoint == "chat":
+                handler = await self._chat(query)
+            elif endpoint == "ws":
+                handler = await self._ws(query)
+            else:
+                handler = await self._upload(self.rng.choice(self.pdfs))
+        except Exception:
+            ok = False
+        finally:
+            self.inflight -= 1
+        self.samples.append((endpoint, handler, time.perf_counter() - scheduled, ok))
+
+    async def run(self) -> float:
+        """Issues arrivals for `duration` seconds, then waits for stragglers. Returns the send window."""
+        tasks = []
+        start = time.perf_counter()
+        next_arrival = start
+        while True:
+            next_arrival += self.rng.expovariate(self.rate)
+            if next_arrival - start > self.duration:
+                break
+            delay = next_arrival - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if self.inflight >= self.max_inflight:
+                self.shed += 1
+                continue
+            self.inflight += 1
+            endpoint = self.rng.choices(self.endpoints, self.weights)[0]
+            tasks.append(asyncio.create_task(self._one(endpoint, next_arrival)))
+        await asyncio.gather(*tasks)
+        return self.duration
+
+    def report(self, window: float) -> Dict[str, Any]:
+        def summarize(rows) -> Dict[str, Any]:
+            latencies = sorted(seconds for _, _, seconds, ok in rows if ok)
+            return {
+                "requests": len(rows),
+                "errors": sum(1 for *_, ok in rows if not ok),
+                "throughput_rps": round(len(latencies) / window, 2),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+            }
+
+        by_endpoint, by_handler = defaultdict(list), defaultdict(list)
+        for row in self.samples:
+            by_endpoint[row[0]].append(row)
+            by_handler[row[1]].append(row)
+        return {
+            "offered_rate_rps": self.rate,
+            "duration_s": window,
+            "shed": self.shed,
+            "total": summarize(self.samples),
+            "endpoints": {name: summarize(rows) for name, rows in sorted(by_endpoint.items())},
+            "handlers": {name: summarize(rows) for name, rows in sorted(by_handler.items())},
+        }
+
+
+async def run(rate: float = 20.0, duration: float = 30.0, mix: str = "chat=0.5,ws=0.4,upload=0.1",
+              url: Optional[str] = None, max_inflight: int = 2000, seed: Optional[int] = None) -> Dict[str, Any]:
+    weights = parse_mix(mix)
+    if url:
+        import websockets
+
+        ws_url = url.replace("http", "ws", 1).rstrip("/") + "/ws/chat"
+
+        async def ws_query(text: str) -> Dict[str, Any]:
+            async with websockets.connect(ws_url) as ws:
+                await ws.send(text)
+                while True:
+                    data = json.loads(await ws.recv())
+                    if data["type"] == "response":
+                        return data["data"]
+
+        async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+            generator = LoadGenerator(client, ws_query, rate, duration, weights, max_inflight, seed)
+            return generator.report(await generator.run())
+
+    from backend.main import app
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=120) as client:
+            generator = LoadGenerator(client, InProcessWebSocket(app, "/ws/chat").query, rate, duration,
+                                      weights, max_inflight, seed)
+            return generator.report(await generator.run())
+
+
+def _print_table(title: str, rows: Dict[str, Dict[str, Any]]):
+    print(f"\n{title:<36} {'reqs':>6} {'err':>5} {'rps':>8} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, r in rows.items():
+        print(f"{name:<36} {r['requests']:>6} {r['errors']:>5} {r['throughput_rps']:>8} "
+              f"{r['p50_ms']:>10} {r['p95_ms']:>10} {r['p99_ms']:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=20.0, help="mean arrivals per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of arrivals")
+    parser.add_argument("--mix", default="chat=0.5,ws=0.4,upload=0.1")
+    parser.add_argument("--url", help="target a running server instead of the in-process app")
+    parser.add_argument("--max-inflight", type=int, default=2000, help="arrivals past this many open requests are shed")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output", help="also write the report as JSON")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.rate, args.duration, args.mix, args.url, args.max_inflight, args.seed))
+    print(f"\nOffered {result['offered_rate_rps']} req/s for {result['duration_s']}s; shed {result['shed']}", file=sys.stderr)
+    _print_table("endpoint", {"total": result["total"], **result["endpoints"]})
+    _print_table("handler", result["handlers"])
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
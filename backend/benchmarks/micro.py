@@ -0,0 +1,159 @@
+"""
+Micro-benchmarks for the hot paths behind a chat request: intent routing,
+document retrieval, the safety scanners, evidence scoring, candidate
+comparison and PDF text extraction, each on synthetic inputs of increasing
+size. Tool latency is switched to the "zero" profile so only our own code
+is timed.
+
+Usage: python -m backend.benchmarks.micro [--quick]
+"""
+import argparse
+import asyncio
+import json
+from typing import Any, Dict
+
+from backend.agents.orchestrator import MasterAgent
+from backend.agents.router import IntentRouter
+from backend.benchmarks import corpora
+from backend.benchmarks.harness import measure, measure_async
+from backend.inference.comparison import MoleculeComparator
+from backend.inference.scoring import EvidenceScorer
+from backend.safety.fact_checker import FactChecker
+from backend.safety.risk_detector import RiskDetector
+from backend.tools.latency import LatencyModel, PRESETS, use_latency_model
+from backend.tools.rag import RAGSystem
+from backend.utils.pdf_processor import extract_text_from_pdf
+
+SIZES = {
+    "query_words": (8, 200, 5000),
+    "text_words": (100, 10_000, 100_000),
+    "rag_documents": (100, 1_000, 10_000),
+    "score_inputs": (1, 100, 10_000),
+    "candidates": (10, 100, 1_000),
+    "pdf_pages": (1, 10, 50),
+}
+QUICK_SIZES = {key: sizes[:2] for key, sizes in SIZES.items()}
+
+ROUTED_QUERIES = [
+    "compare metformin and rapamycin",
+    "what is the mechanism of action",
+    "show the regulatory approval path",
+    "evaluate metformin repurposing",  # default handler: full worker fan-out
+]
+
+
+def bench_routing(sizes) -> Dict[str, Any]:
+    results = {}
+    router = IntentRouter()
+    for words in sizes:
+        query = corpora.make_text(words)
+        results[f"micro.router.route[words={words}]"] = measure(lambda: router.route(query))
+
+    master = MasterAgent()
+    for query in ROUTED_QUERIES:
+        handler = router.route(query).handler
+        results[f"micro.process_query[{handler}]"] = asyncio.run(
+            measure_async(lambda: master.process_query(query), repeat=50)
+        )
+    return results
+
+
+def bench_rag(sizes) -> Dict[str, Any]:
+    results = {}
+    query = "metformin tau accumulation in murine models"
+    for count in sizes:
+        rag = RAGSystem(vector_index_path="")
+        rag.add_documents(corpora.make_documents(count))
+        results[f"micro.rag.retrieve[docs={count}]"] = asyncio.run(
+            measure_async(lambda: rag.retrieve(query), repeat=50)
+        )
+    return results
+
+
+# Common phrasings the default lexicon must keep catching, with the term each reports
+RISK_PHRASINGS = {
+    "Patients reported serious adverse events and side effects.": {"adverse event", "side effect"},
+    "Hepatotoxicity and two deaths led to recalls; lawsuits followed.": {"hepatotoxic", "death", "recall", "lawsuit"},
+    "TOXIC at high doses; toxicity was dose-limiting.": {"toxic"},
+}
+
+
+def _check_risk_phrasings(detector: RiskDetector):
+    for text, expected in RISK_PHRASINGS.items():
+        found = {risk["keyword"] for risk in detector.assess_risk(text)["risks"]}
+        assert found == expected, f"{text!r}: expected {sorted(expected)}, found {sorted(found)}"
+
+
+def _stream_risks(detector: RiskDetector, pages):
+    stream = detector.stream()
+    for page in pages:
+        stream.feed(page)
+    return stream.result()
+
+
+def bench_scanners(sizes) -> Dict[str, Any]:
+    results = {}
+    detector, checker = RiskDetector(), FactChecker()
+    _check_risk_phrasings(detector)
+    for words in sizes:
+        text = corpora.make_text(words)
+        results[f"micro.risk_detector.assess_risk[words={words}]"] = measure(lambda: detector.assess_risk(text))
+        # Page-sized chunks, as when scanning a PDF as it is extracted
+        pages = [text[i:i + 3000] for i in range(0, len(text), 3000)]
+        results[f"micro.risk_detector.stream[words={words}]"] = measure(lambda: _stream_risks(detector, pages))
+        results[f"micro.fact_checker.verify[words={words}]"] = measure(lambda: checker.verify(text))
+        results[f"micro.fact_checker.verify_chunks[words={words}]"] = measure(lambda: checker.verify_chunks(pages))
+    return results
+
+
+def bench_scoring(sizes) -> Dict[str, Any]:
+    results = {}
+    scorer = EvidenceScorer()
+    for count in sizes:
+        inputs = corpora.make_score_inputs(count)
+        results[f"micro.scorer.calculate_score[n={count}]"] = measure(
+            lambda: [scorer.calculate_score(d) for d in inputs]
+        )
+        columns = EvidenceScorer.to_columns(inputs)
+        results[f"micro.scorer.score_batch[n={count}]"] = measure(lambda: scorer.score_batch(columns))
+    return results
+
+
+def bench_comparison(sizes) -> Dict[str, Any]:
+    results = {}
+    comparator = MoleculeComparator()
+    for count in sizes:
+        candidates = corpora.make_candidates(count)
+        results[f"micro.comparator.compare[n={count}]"] = measure(lambda: comparator.compare(candidates))
+    return results
+
+
+def bench_pdf(sizes) -> Dict[str, Any]:
+    results = {}
+    for pages in sizes:
+        pdf = corpora.make_pdf(pages)
+        results[f"micro.extract_text_from_pdf[pages={pages}]"] = measure(lambda: extract_text_from_pdf(pdf), repeat=5)
+    return results
+
+
+def run(quick: bool = False) -> Dict[str, Any]:
+    sizes = QUICK_SIZES if quick else SIZES
+    previous = use_latency_model(LatencyModel.from_spec(PRESETS["zero"], name="zero"))
+    try:
+        results = {}
+        results.update(bench_routing(sizes["query_words"]))
+        results.update(bench_rag(sizes["rag_documents"]))
+        results.update(bench_scanners(sizes["text_words"]))
+        results.update(bench_scoring(sizes["score_inputs"]))
+        results.update(bench_comparison(sizes["candidates"]))
+        results.update(bench_pdf(sizes["pdf_pages"]))
+        return results
+    finally:
+        use_latency_model(previous)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true", help="smaller inputs, for CI smoke runs")
+    args = parser.parse_args()
+    print(json.dumps(run(args.quick), indent=2))
@@ -0,0 +1,67 @@
+"""
+Compares chat throughput when a MasterAgent is built per request (the old
+behaviour of /api/chat and /ws/chat) against a single shared instance.
+The query takes the default route, so each request runs the full worker
+fan-out. Tool latency uses the "zero" profile so only our code is timed.
+
+Usage: python -m backend.benchmarks.shared_orchestrator [--requests N] [--concurrency C]
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, Any
+
+from backend.agents.orchestrator import MasterAgent
+from backend.agents.router import DEFAULT_HANDLER, IntentRouter
+from backend.tools.latency import LatencyModel, PRESETS, use_latency_model
+
+QUERY = "evaluate metformin repurposing"
+
+
+async def _run(requests: int, concurrency: int, shared: bool) -> Dict[str, Any]:
+    master = MasterAgent() if shared else None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_request():
+        async with semaphore:
+            agent = master if shared else MasterAgent()
+            await agent.process_query(QUERY, history=[])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_request() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": "shared" if shared else "per_request",
+        "requests": requests,
+        "seconds": round(elapsed, 4),
+        "requests_per_sec": round(requests / elapsed, 1),
+    }
+
+
+def run(requests: int = 5000, concurrency: int = 64) -> Dict[str, Any]:
+    handler = IntentRouter().route(QUERY).handler
+    assert handler == DEFAULT_HANDLER, f"{QUERY!r} routes to {handler}, not the standard analysis fan-out"
+    previous = use_latency_model(LatencyModel.from_spec(PRESETS["zero"], name="zero"))
+    try:
+        before = asyncio.run(_run(requests, concurrency, shared=False))
+        after = asyncio.run(_run(requests, concurrency, shared=True))
+    finally:
+        use_latency_model(previous)
+    return {
+        "before": before,
+        "after": after,
+        "speedup": round(after["requests_per_sec"] / before["requests_per_sec"], 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    result = run(args.requests, args.concurrency)
+    for key in ("before", "after"):
+        r = result[key]
+        print(f"{r['mode']:>12}: {r['requests_per_sec']:>10} req/s ({r['requests']} requests in {r['seconds']}s)")
+    print(f"     speedup: {result['speedup']}x")
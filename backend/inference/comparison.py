@@ -1,7 +1,125 @@
-from typing import List, Dict, Any
+import heapq
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+# Ranking keys are field names, ranked highest first, or (field, "asc"|"desc")
+RankKey = Union[str, Tuple[str, str]]
+DEFAULT_RANKING: Tuple[RankKey, ...] = ("score",)
+
+_MONEY = re.compile(r"^\s*\$?\s*([0-9][0-9,]*(?:\.[0-9]*)?|\.[0-9]+)\s*([KMBT])?", re.IGNORECASE)
+_UNITS = {"": 1.0, "K": 1e3, "M": 1e6, "B": 1e9, "T": 1e12}
+
+
+def parse_market_potential(value: Any) -> float:
+    """
+    Market size in dollars from strings like "$1.2B", "$800M", "$500K" or
+    "1,500,000"; numbers pass through. Unparseable values count as 0.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _MONEY.match(str(value or ""))
+    if match is None:
+        return 0.0
+    number, unit = match.groups()
+    return float(number.replace(",", "")) * _UNITS[(unit or "").upper()]
+
+
+def field_getter(field: str) -> Callable[[Dict[str, Any]], float]:
+    """Returns a function giving the numeric view of `field` used for ranking and comparisons."""
+    if field == "market_potential":
+        return lambda candidate: parse_market_potential(candidate.get("market_potential", "$0"))
+    if field == "patent_status":
+        # Expired patents mean freedom to operate, which ranks higher
+        return lambda candidate: 1.0 if candidate.get("patent_status") == "Expired" else 0.0
+
+    def numeric(candidate: Dict[str, Any]) -> float:
+        value = candidate.get(field, 0)
+        try:
+            return float(value or 0)
+        except (TypeError, ValueError):
+            return 0.0
+    return numeric
+
+
+def _normalize_ranking(rank_by: Sequence[RankKey]) -> List[Tuple[str, bool]]:
+    keys = []
+    for key in rank_by:
+        field, order = (key, "desc") if isinstance(key, str) else key
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Unknown order {order!r} for {field!r}; expected 'asc' or 'desc'")
+        keys.append((field, order == "desc"))
+    if not keys:
+        raise ValueError("rank_by needs at least one field")
+    return keys
+
+
+class RankedCandidates(Sequence):
+    """
+    Candidates in rank order, computed lazily: only the prefix that has been
+    asked for is ever ordered (by heap selection), so paging through the
+    first few pages of a 50k screen never sorts the rest. Each candidate's
+    sort key is computed once, and ties keep input order.
+    """
+
+    def __init__(self, candidates: Sequence[Dict[str, Any]], rank_by: Sequence[RankKey] = DEFAULT_RANKING):
+        self.candidates = candidates
+        self.rank_by = _normalize_ranking(rank_by)
+        # (key..., input index), built a column at a time; descending fields
+        # are negated so that smaller always ranks first
+        columns = []
+        for field, descending in self.rank_by:
+            get = field_getter(field)
+            columns.append([-get(c) for c in candidates] if descending else [get(c) for c in candidates])
+        self._keys = list(zip(*columns, range(len(candidates))))
+        self._order: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def _ensure(self, count: int):
+        count = min(count, len(self._keys))
+        if count <= len(self._order):
+            return
+        # Grow geometrically so paging forward costs O(n log k) amortized
+        count = min(max(count, 2 * len(self._order)), len(self._keys))
+        if count * 4 >= len(self._keys):
+            ranked = sorted(self._keys)
+        else:
+            ranked = heapq.nsmallest(count, self._keys)
+        self._order = [key[-1] for key in ranked]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            self._ensure(max(start, stop) if step > 0 else start + 1)
+            return [self.candidates[self._order[i]] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("candidate index out of range")
+        self._ensure(index + 1)
+        return self.candidates[self._order[index]]
+
+    def top(self, k: int) -> List[Dict[str, Any]]:
+        return self[:k]
+
+    def page(self, number: int, size: int = 20) -> Dict[str, Any]:
+        """Page `number` (0-based) of `size` ranked candidates."""
+        if number < 0 or size <= 0:
+            raise ValueError("page number must be >= 0 and size > 0")
+        start = number * size
+        return {
+            "page": number,
+            "size": size,
+            "total": len(self),
+            "items": self[start:start + size],
+            "has_more": start + size < len(self),
+        }
+
 
 class MoleculeComparator:
-    def compare(self, candidates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def compare(self, candidates: List[Dict[str, Any]], top_k: Optional[int] = 10,
+                rank_by: Sequence[RankKey] = DEFAULT_RANKING) -> Dict[str, Any]:
         """
         Compares multiple drug candidates based on key metrics.
         Expected candidate structure:
@@ -12,39 +130,81 @@ class MoleculeComparator:
             "patent_status": "Expired",
             "market_potential": "$1.2B"
         }
+        Candidates are ranked by `rank_by` (default: score, highest first;
+        later fields break ties, then input order). "ranked_list" holds the
+        top `top_k` (all if None) and pairwise insights cover only those;
+        "next_offset" is where the rest of the ranking continues (None if
+        nothing is left), for use with page(). The result is plain,
+        JSON-serializable data.
         """
         if not candidates:
             return {"error": "No candidates provided for comparison."}
 
-        # Sort by score descending
-        sorted_candidates = sorted(candidates, key=lambda x: x.get("score", 0), reverse=True)
-        
-        winner = sorted_candidates[0]
-        
+        ranking = self.rank(candidates, rank_by)
+        top = ranking.top(len(candidates) if top_k is None else max(top_k, 1))
+        winner = top[0]
+
         comparison_summary = f"Top candidate is {winner['name']} with a score of {winner.get('score', 0)}."
-        
-        # Generate pairwise insights
+
+        # Generate pairwise insights for adjacent top-k candidates only
+        profiles = [self._profile(c) for c in top]
         insights = []
-        for i in range(len(sorted_candidates) - 1):
-            c1 = sorted_candidates[i]
-            c2 = sorted_candidates[i+1]
+        for (c1, p1), (c2, p2) in zip(zip(top, profiles), zip(top[1:], profiles[1:])):
             diff = c1.get("score", 0) - c2.get("score", 0)
-            insights.append(f"{c1['name']} outperforms {c2['name']} by {round(diff, 1)} points, primarily due to {self._get_advantage(c1, c2)}.")
+            insights.append(f"{c1['name']} outperforms {c2['name']} by {round(diff, 1)} points, primarily due to {self._advantage(p1, p2)}.")
 
         return {
-            "ranked_list": sorted_candidates,
+            "ranked_list": top,
+            "total_candidates": len(candidates),
+            "next_offset": len(top) if len(top) < len(candidates) else None,
             "winner": winner,
             "summary": comparison_summary,
             "insights": insights
         }
 
-    def _get_advantage(self, c1: Dict[str, Any], c2: Dict[str, Any]) -> str:
-        """Determines the primary advantage of c1 over c2."""
-        if c1.get("clinical_count", 0) > c2.get("clinical_count", 0):
+    def rank(self, candidates: Sequence[Dict[str, Any]],
+             rank_by: Sequence[RankKey] = DEFAULT_RANKING) -> RankedCandidates:
+        """The full ranking as a lazy sequence; hold on to it to page through one screen repeatedly."""
+        return RankedCandidates(candidates, rank_by)
+
+    def page(self, candidates: Sequence[Dict[str, Any]], offset: int = 0, limit: int = 20,
+             rank_by: Sequence[RankKey] = DEFAULT_RANKING) -> Dict[str, Any]:
+        """
+        Ranked candidates [offset, offset + limit), e.g. continuing from a
+        compare() "next_offset". Only the ranking up to the end of the page is
+        ordered, so early pages of a large screen stay cheap.
+        """
+        if offset < 0 or limit <= 0:
+            raise ValueError("offset must be >= 0 and limit > 0")
+        ranking = self.rank(candidates, rank_by)
+        items = ranking[offset:offset + limit]
+        end = offset + len(items)
+        return {
+            "items": items,
+            "offset": offset,
+            "total": len(ranking),
+            "next_offset": end if end < len(ranking) else None,
+        }
+
+    @staticmethod
+    def _profile(candidate: Dict[str, Any]) -> Tuple[Any, bool, float]:
+        """Fields _advantage compares, normalized once per candidate."""
+        return (candidate.get("clinical_count", 0), candidate.get("patent_status") == "Expired",
+                parse_market_potential(candidate.get("market_potential", "$0")))
+
+    @staticmethod
+    def _advantage(p1: Tuple[Any, bool, float], p2: Tuple[Any, bool, float]) -> str:
+        clinical1, expired1, market1 = p1
+        clinical2, expired2, market2 = p2
+        if clinical1 > clinical2:
             return "stronger clinical evidence"
-        elif c1.get("patent_status") == "Expired" and c2.get("patent_status") != "Expired":
+        elif expired1 and not expired2:
             return "better patent freedom"
-        elif float(c1.get("market_potential", "$0").replace("$", "").replace("B", "")) > float(c2.get("market_potential", "$0").replace("$", "").replace("B", "")):
+        elif market1 > market2:
             return "higher market potential"
         else:
             return "overall balanced profile"
+
+    def _get_advantage(self, c1: Dict[str, Any], c2: Dict[str, Any]) -> str:
+        """Determines the primary advantage of c1 over c2."""
+        return self._advantage(self._profile(c1), self._profile(c2))
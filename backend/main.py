@@ -1,16 +1,68 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+from contextlib import aclosing, asynccontextmanager
 import time
 import asyncio
 import os
+import uuid
+from datetime import datetime
 from backend.agents.orchestrator import MasterAgent
-from backend.utils.pdf_processor import extract_text_from_pdf
+from backend.utils.pdf_processor import PDFExtractionPool, PDFPoolBusy, PDFExtractionError
+from backend.utils.extraction_cache import ExtractionCache
+from backend.utils.uploads import MalformedUpload, UploadSizeLimitMiddleware, UploadTooLarge, spool_multipart
+from backend.utils.sse import StreamRegistry, parse_event_id
+from backend.monitoring import metrics
+from backend.monitoring.tracing import TracingMiddleware, tracer
+from backend.tools.cache import tool_cache
+from backend.tools.sessions import SessionDocumentStore
 
 from fastapi.staticfiles import StaticFiles
 
-app = FastAPI(title="CuraVyom API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the orchestrator, its worker pool, indexes and helpers once per
+    # process. MasterAgent keeps no per-request state, so it is safe to share
+    # across concurrent HTTP and websocket requests.
+    # Uploaded documents are indexed per chat session and searched by DocAgent
+    app.state.sessions = SessionDocumentStore.from_env()
+    app.state.master = MasterAgent(sessions=app.state.sessions)
+    # CPU-bound PDF parsing runs in worker processes, never on the event loop
+    app.state.pdf_pool = PDFExtractionPool.from_env()
+    app.state.extraction_cache = ExtractionCache.from_env()
+    # Background producers for /api/chat/stream, replayable on reconnect
+    app.state.streams = StreamRegistry(
+        buffer_size=int(os.getenv("SSE_REPLAY_EVENTS", "256")),
+        retain_seconds=float(os.getenv("SSE_RETAIN_SECONDS", "120")),
+    )
+    metrics.CACHE_HIT_RATIO.fn = lambda: _cache_hit_ratios(app)
+    yield
+    app.state.streams.shutdown()
+    app.state.pdf_pool.shutdown()
+    app.state.master.audit_logger.flush()
+
+app = FastAPI(title="CuraVyom API", version="1.0.0", lifespan=lifespan)
+
+def _cache_hit_ratios(app: FastAPI) -> dict:
+    """Scrape-time hit ratios for the tool-call cache (per source) and the PDF extraction cache."""
+    ratios = {("tool", source): stats["hit_ratio"] for source, stats in tool_cache.stats()["sources"].items()}
+    extraction = app.state.extraction_cache.stats
+    lookups = extraction["memory_hits"] + extraction["disk_hits"] + extraction["misses"]
+    if lookups:
+        ratios[("extraction", "memory")] = extraction["memory_hits"] / lookups
+        ratios[("extraction", "disk")] = extraction["disk_hits"] / lookups
+        ratios[("extraction", "all")] = (extraction["memory_hits"] + extraction["disk_hits"]) / lookups
+    return ratios
+
+# Upload limits: bodies are streamed to disk and rejected early past the max size
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "100")) * 1024 * 1024
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR", os.path.join(".cache", "uploads"))
+# Largest text window served by /api/documents/{document_id}
+INLINE_TEXT_LIMIT = int(os.getenv("INLINE_TEXT_LIMIT", "65536"))
+# Largest page served by /api/audit
+AUDIT_PAGE_LIMIT = 1000
 
 # CORS Configuration
 origins = [
@@ -19,6 +71,13 @@ origins = [
     os.getenv("FRONTEND_URL", ""), # Production frontend URL
 ]
 
+# Registered before CORS so CORS stays outermost and also wraps early 413s
+app.add_middleware(UploadSizeLimitMiddleware, max_bytes=MAX_UPLOAD_BYTES)
+# Request latency per route template; wraps the upload limit so early 413s are counted
+app.add_middleware(metrics.MetricsMiddleware)
+# Root trace span per request; its id is returned in X-Trace-Id and response metadata
+app.add_middleware(TracingMiddleware, tracer=tracer)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -33,6 +92,7 @@ app.mount("/reports", StaticFiles(directory="reports"), name="reports")
 class ChatRequest(BaseModel):
     message: str
     history: Optional[List[dict]] = []
+    session_id: Optional[str] = None # Set to query documents uploaded with this session_id
 
 class ChatResponse(BaseModel):
     id: int
@@ -46,43 +106,197 @@ async def root():
     return {"status": "online", "system": "CuraVyom Agentic Protocol v2.0"}
 
 @app.post("/api/chat")
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     try:
         # Simulate processing delay
-        await asyncio.sleep(1)
+        with tracer.span("simulated_delay", seconds=1):
+            await asyncio.sleep(1)
         
-        # Instantiate Master Agent
-        master = MasterAgent()
-        response_data = await master.process_query(request.message)
+        master: MasterAgent = http_request.app.state.master
+        response_data = await master.process_query(request.message, history=request.history, session_id=request.session_id)
         
         return response_data
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.post("/api/upload")
-async def upload_file(file: UploadFile = File(...)):
+def _sse_response(request: Request, message: str, history: List[dict], session_id: Optional[str],
+                  last_event_id: Optional[str]) -> StreamingResponse:
     """
-    Analyzes uploaded files. Uses pypdf for PDF text extraction.
+    Resumes the run named by Last-Event-ID if it is still held, otherwise
+    starts a new one. The run is produced in a background task, so a dropped
+    connection doesn't cancel the analysis and a reconnect replays only the
+    events the client missed.
     """
-    # Simulate processing delay
-    await asyncio.sleep(1.0)
-    
-    filename = file.filename.lower()
+    streams: StreamRegistry = request.app.state.streams
+    stream_id, seq = parse_event_id(request.headers.get("last-event-id") or last_event_id)
+    run = streams.get(stream_id)
+    if run is None:
+        master: MasterAgent = request.app.state.master
+        run = streams.start(master.stream_query(message, history=history, session_id=session_id))
+        seq = -1
+    return StreamingResponse(
+        run.subscribe(after=seq),
+        media_type="text/event-stream",
+        # Disable proxy buffering so events are flushed as they happen
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.post("/api/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request, last_event_id: Optional[str] = None):
+    """
+    Server-Sent Events version of /api/chat for clients that can't use the
+    websocket. Streams the same events as /ws/chat; each has an id of the
+    form "<stream_id>:<seq>" for resuming via the Last-Event-ID header.
+    """
+    return _sse_response(http_request, request.message, request.history or [], request.session_id, last_event_id)
+
+@app.get("/api/chat/stream")
+async def chat_stream_get(http_request: Request, message: str, session_id: Optional[str] = None,
+                          last_event_id: Optional[str] = None):
+    """EventSource-friendly variant of POST /api/chat/stream (browsers resend Last-Event-ID on reconnect)."""
+    return _sse_response(http_request, message, [], session_id, last_event_id)
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return PlainTextResponse(metrics.registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss/coalescing counters for the shared tool-call cache."""
+    return tool_cache.stats()
+
+def _parse_time(value: Optional[str]) -> Optional[float]:
+    """Unix seconds or an ISO 8601 datetime (local time if no offset)."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid time {value!r}; use unix seconds or ISO 8601")
+
+@app.get("/api/audit")
+async def audit_events(request: Request, start: Optional[str] = None, end: Optional[str] = None,
+                       agent: Optional[str] = None, action: Optional[str] = None,
+                       session_id: Optional[str] = None, query: Optional[str] = None,
+                       limit: int = 100, cursor: Optional[str] = None, order: str = "desc"):
+    """
+    Audit events in [start, end) filtered by agent, action, session_id and/or
+    exact query text. Pages are cursor-based: pass `next_cursor` from one
+    response as `cursor` to get the next page.
+    """
+    store = request.app.state.master.audit_logger.store
+    if store is None:
+        raise HTTPException(status_code=503, detail="Audit store is disabled (AUDIT_DB is empty)")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    limit = max(1, min(limit, AUDIT_PAGE_LIMIT))
+    try:
+        return await asyncio.to_thread(
+            store.query, _parse_time(start), _parse_time(end), limit, cursor, order == "desc",
+            agent=agent, action=action, session_id=session_id, query=query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# The body is parsed by spool_multipart rather than FastAPI's File()/Form(),
+# so the schema is declared here for the API docs
+UPLOAD_REQUEST_BODY = {"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+    "type": "object",
+    "required": ["file"],
+    "properties": {"file": {"type": "string", "format": "binary"}, "session_id": {"type": "string"}},
+}}}}}
+
+@app.post("/api/upload", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_file(request: Request):
+    """
+    Analyzes uploaded files. Uses pypdf for PDF text extraction. PDF text is
+    chunked into the session's retrieval index, so later chat requests with
+    the same session_id only need to send the query.
+
+    The multipart body is streamed straight into one spool file (hashed and
+    size-checked as it arrives) instead of being buffered by Starlette and
+    then copied, so each upload is written to disk once.
+    """
+    try:
+        with tracer.span("upload.spool"):
+            form = await spool_multipart(request, UPLOAD_SPOOL_DIR, MAX_UPLOAD_BYTES)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except MalformedUpload as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    upload = form.file
+    if upload is None:
+        raise HTTPException(status_code=422, detail="A file is required in the 'file' form field")
+    session_id: Optional[str] = form.fields.get("session_id") or None
+    filename = form.filename.lower()
     
     if ".pdf" in filename:
-        content = await file.read()
-        extracted_text = extract_text_from_pdf(content)
+        metrics.UPLOAD_SIZE.observe(upload.size, "pdf")
+
+        try:
+            cache: ExtractionCache = request.app.state.extraction_cache
+
+            # Repeat uploads of the same bytes skip pypdf entirely
+            with tracer.span("extraction_cache.get"):
+                extracted_text = await asyncio.to_thread(cache.get, upload.sha256)
+            cache_hit = extracted_text is not None
+            if not cache_hit:
+                try:
+                    # Workers parse the spooled file by path; no bytes are copied
+                    started = time.perf_counter()
+                    with tracer.span("pdf.extract", size_bytes=upload.size) as span:
+                        extracted_text, pages = await request.app.state.pdf_pool.extract_document(upload.path)
+                        if span is not None:
+                            span.set_attribute("pages", pages)
+                    elapsed = time.perf_counter() - started
+                except PDFPoolBusy as e:
+                    raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+                except PDFExtractionError as e:
+                    raise HTTPException(status_code=422, detail=str(e))
+                if pages:
+                    metrics.PDF_PAGES.inc(amount=pages)
+                    metrics.PDF_EXTRACTION_SECONDS.inc(amount=elapsed)
+                    metrics.PDF_PAGES_PER_SECOND.observe(pages / max(elapsed, 1e-6))
+                if not extracted_text.startswith("Error extracting text"):
+                    await asyncio.to_thread(cache.put, upload.sha256, extracted_text)
+        finally:
+            os.remove(upload.path)
         
-        # Truncate if too long for a summary, but return enough for context
+        session_id = session_id or uuid.uuid4().hex
+        chunks_indexed = 0
+        if not extracted_text.startswith("Error extracting text"):
+            sessions: SessionDocumentStore = request.app.state.sessions
+            with tracer.span("sessions.ingest"):
+                chunks_indexed = await asyncio.to_thread(sessions.ingest, session_id, upload.sha256, extracted_text, form.filename)
+
+        # Truncate for the summary; the full text stays server-side
         preview = extracted_text[:500] + "..." if len(extracted_text) > 500 else extracted_text
         
         return {
             "status": "success",
-            "analysis": f"**PDF Analysis Complete**\n\n**Extracted Content:**\n{preview}\n\n(Full text processed for context)",
-            "full_text": extracted_text, # Frontend can use this to feed back into chat context
+            "analysis": f"**PDF Analysis Complete**\n\n**Extracted Content:**\n{preview}\n\n(Full text indexed for this session)",
+            "document_id": upload.sha256, # Full text is available from /api/documents/{document_id}
+            "session_id": session_id,
+            "chunks_indexed": chunks_indexed,
+            "text_length": len(extracted_text),
+            "size_bytes": upload.size,
+            "cache_hit": cache_hit,
             "type": "document"
         }
-    elif "structure" in filename or ".mol" in filename or ".png" in filename:
+
+    # Only PDFs are read; other uploads are classified by name
+    os.remove(upload.path)
+    metrics.UPLOAD_SIZE.observe(upload.size, "other")
+
+    # Simulate processing delay
+    with tracer.span("simulated_delay", seconds=1):
+        await asyncio.sleep(1.0)
+
+    if "structure" in filename or ".mol" in filename or ".png" in filename:
         return {
             "status": "success",
             "analysis": "Chemical Structure Analysis: Identified indole scaffold. High similarity to serotonin receptor modulators.",
@@ -95,6 +309,26 @@ async def upload_file(file: UploadFile = File(...)):
             "type": "generic"
         }
 
+@app.get("/api/documents/{document_id}")
+async def get_document_text(request: Request, document_id: str, offset: int = 0, limit: int = INLINE_TEXT_LIMIT):
+    """
+    Returns a window of an uploaded document's extracted text, so large
+    documents can be fetched in pages instead of inlined in every response.
+    """
+    text = await asyncio.to_thread(request.app.state.extraction_cache.get, document_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Document not found or expired; upload it again.")
+    offset = max(offset, 0)
+    limit = max(min(limit, INLINE_TEXT_LIMIT), 0)
+    chunk = text[offset:offset + limit]
+    return {
+        "document_id": document_id,
+        "offset": offset,
+        "text": chunk,
+        "text_length": len(text),
+        "next_offset": offset + len(chunk) if offset + len(chunk) < len(text) else None
+    }
+
 class SubscriptionRequest(BaseModel):
     email: str
 
@@ -143,31 +377,24 @@ async def contact_form(request: ContactRequest):
     return {"status": "success", "message": "Message sent successfully."}
 
 @app.websocket("/ws/chat")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, session_id: Optional[str] = None):
     await websocket.accept()
+    master: MasterAgent = websocket.app.state.master
+    # Conversation memory lives with the connection, not the shared agent
+    history: List[dict] = []
     try:
         while True:
             data = await websocket.receive_text()
-            # Simulate "typing" or "processing" logs
             await websocket.send_json({"type": "log", "content": "Received query. Initiating Master Agent..."})
-            await asyncio.sleep(0.5)
-            
-            # Instantiate Master Agent
-            master = MasterAgent()
-            
-            # In a real streaming scenario, the agent would yield chunks.
-            # Here we simulate streaming logs before the final result.
-            await websocket.send_json({"type": "log", "content": "Decomposing task..."})
-            await asyncio.sleep(0.5)
-            
-            await websocket.send_json({"type": "log", "content": "Deploying worker agents..."})
-            await asyncio.sleep(0.5)
-            
-            # Get final response
-            response_data = await master.process_query(data)
-            
-            # Send final response
-            await websocket.send_json({"type": "response", "data": response_data})
+
+            # Forward routing, per-worker results and score updates as they
+            # happen; the last event is the full response.
+            started = time.perf_counter()
+            with tracer.trace("WS /ws/chat"):
+                async with aclosing(master.stream_query(data, history=history, session_id=session_id)) as events:
+                    async for event in events:
+                        await websocket.send_json(event)
+            metrics.WS_MESSAGE_DURATION.observe(time.perf_counter() - started, "/ws/chat")
             
     except WebSocketDisconnect:
         print("Client disconnected")
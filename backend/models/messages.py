@@ -17,6 +17,11 @@ class AgentTask(BaseModel):
     assigned_to: str
     status: Literal["pending", "in_progress", "completed", "failed"] = "pending"
     result: Optional[Dict[str, Any]] = None
+    depends_on: List[str] = Field(default_factory=list, description="task_ids that must complete before this task starts")
+    error: Optional[str] = None
+    started_at: Optional[float] = Field(None, description="Seconds since workflow start")
+    finished_at: Optional[float] = Field(None, description="Seconds since workflow start")
+    duration_ms: Optional[float] = None
 
 class WorkflowState(BaseModel):
     query: str
@@ -0,0 +1,189 @@
+import math
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Metrics are recorded from the event loop thread. Updates are plain dict and
+# list operations with no locks: under the GIL a concurrent update from
+# another thread can at worst lose a single increment, which is an accepted
+# trade for keeping observe() to about a microsecond on the request path.
+
+LabelValues = Tuple[str, ...]
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 5 * 1024 ** 2, 10 * 1024 ** 2, 25 * 1024 ** 2, 50 * 1024 ** 2, 100 * 1024 ** 2)
+RATE_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> Iterable[str]:
+        return ()
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in list(self._values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """Fixed-bucket histogram. Buckets are stored non-cumulative and summed at scrape time."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, List[float]] = {}  # bucket counts..., +Inf count, sum
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0.0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return int(sum(series[:-1])) if series else 0
+
+    def samples(self) -> Iterable[str]:
+        for labels, series in list(self._series.items()):
+            series = list(series)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = 'le="' + ("+Inf" if math.isinf(bound) else _format_value(bound)) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {_format_value(cumulative)}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, labels)} {_format_value(cumulative)}"
+
+
+class CallbackGauge(Metric):
+    """Gauge computed at scrape time by `fn`, which returns {label_values: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 fn: Optional[Callable[[], Dict[LabelValues, float]]] = None):
+        super().__init__(name, help, labelnames)
+        self.fn = fn
+
+    def samples(self) -> Iterable[str]:
+        if self.fn is None:
+            return
+        for labels, value in self.fn().items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "curavyom_http_request_duration_seconds", "HTTP request latency by route template, method and status.",
+    ("route", "method", "status")))
+WS_MESSAGE_DURATION = registry.register(Histogram(
+    "curavyom_websocket_message_duration_seconds", "Time from a websocket query to its final response, by route.",
+    ("route",)))
+HANDLER_REQUESTS = registry.register(Counter(
+    "curavyom_handler_requests_total", "Queries routed to each MasterAgent handler.", ("handler",)))
+HANDLER_DURATION = registry.register(Histogram(
+    "curavyom_handler_duration_seconds", "MasterAgent handler latency, routing to final response.", ("handler",)))
+WORKER_DURATION = registry.register(Histogram(
+    "curavyom_worker_duration_seconds", "Worker agent process() latency, including failed calls.", ("worker",)))
+WORKER_ERRORS = registry.register(Counter(
+    "curavyom_worker_errors_total", "Worker agent calls that raised or timed out.", ("worker",)))
+UPLOAD_SIZE = registry.register(Histogram(
+    "curavyom_upload_size_bytes", "Size of uploaded files.", ("type",), buckets=SIZE_BUCKETS))
+PDF_PAGES = registry.register(Counter(
+    "curavyom_pdf_pages_extracted_total", "PDF pages extracted (cache misses only)."))
+PDF_EXTRACTION_SECONDS = registry.register(Counter(
+    "curavyom_pdf_extraction_seconds_total", "Wall time spent extracting PDFs (cache misses only)."))
+PDF_PAGES_PER_SECOND = registry.register(Histogram(
+    "curavyom_pdf_pages_per_second", "Per-document PDF extraction throughput.", buckets=RATE_BUCKETS))
+CACHE_HIT_RATIO = registry.register(CallbackGauge(
+    "curavyom_cache_hit_ratio", "Hit ratio per cache and source since startup.", ("cache", "source")))
+
+
+def route_label(scope) -> str:
+    """The matched route's path template (e.g. /api/documents/{document_id}), so labels stay low-cardinality."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP request latency per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, route_label(scope), scope["method"], status)
@@ -0,0 +1,334 @@
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+# Head-based sampling: the decision is made once when a trace starts and
+# inherited by every span in it. Unsampled traces still get a trace id (so it
+# can be returned to clients) but create no span objects, so the cost at full
+# traffic is a context-variable lookup per instrumented call.
+
+
+def _new_id(nbytes: int) -> str:
+    return os.urandom(nbytes).hex()
+
+
+class Span:
+    __slots__ = ("trace", "trace_id", "span_id", "parent_id", "name", "attributes", "start_ns", "end_ns", "status", "error")
+
+    def __init__(self, trace: "_Trace", name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.trace_id = trace.trace_id
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    @property
+    def sampled(self) -> bool:
+        return self.trace.sampled
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3) if self.end_ns else None,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class _Trace:
+    """Spans of one sampled trace, exported together when the root span ends."""
+
+    __slots__ = ("trace_id", "sampled", "spans", "flushed")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = _new_id(16)
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.flushed = False
+
+
+class _UnsampledSpan:
+    """Stand-in current span for a trace that isn't recorded; carries only the trace id."""
+
+    __slots__ = ("trace_id",)
+    sampled = False
+    span_id = None
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+
+class _Scope:
+    """Context manager that makes a span current and, optionally, ends it on exit."""
+
+    __slots__ = ("tracer", "span", "end", "token")
+
+    def __init__(self, tracer: "Tracer", span, end: bool):
+        self.tracer = tracer
+        self.span = span
+        self.end = end
+
+    def __enter__(self):
+        self.token = self.tracer._current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._current.reset(self.token)
+        if self.end:
+            self.tracer.end_span(self.span, exc)
+        return False
+
+
+class _NullScope:
+    __slots__ = ("value",)
+
+    def __init__(self, value=None):
+        self.value = value
+
+    def __enter__(self):
+        return self.value
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SCOPE = _NullScope()
+
+
+class JsonlExporter:
+    """Appends one JSON object per span to a local file."""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def export(self, spans: List[Span]):
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(span.to_dict(), default=str) + "\n" for span in spans))
+
+
+class OTLPJsonExporter:
+    """
+    POSTs spans as OTLP/HTTP JSON (ExportTraceServiceRequest) to
+    `<endpoint>/v1/traces`, for an OpenTelemetry collector or a local stand-in.
+    """
+
+    def __init__(self, endpoint: str, service_name: str = "curavyom-api", timeout: float = 2.0):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        self.timeout = timeout
+
+    @staticmethod
+    def _value(value: Any) -> Dict[str, Any]:
+        if isinstance(value, bool):
+            return {"boolValue": value}
+        if isinstance(value, int):
+            return {"intValue": str(value)}
+        if isinstance(value, float):
+            return {"doubleValue": value}
+        return {"stringValue": str(value)}
+
+    def payload(self, spans: List[Span]) -> Dict[str, Any]:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": "backend.monitoring.tracing"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [{"key": k, "value": self._value(v)} for k, v in span.attributes.items()],
+                    # OTLP status codes: 1 = OK, 2 = ERROR
+                    "status": {"code": 2, "message": span.error or ""} if span.status == "error" else {"code": 1},
+                } for span in spans],
+            }],
+        }]}
+
+    def export(self, spans: List[Span]):
+        request = urllib.request.Request(self.url, data=json.dumps(self.payload(spans)).encode(),
+                                         headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Tracer:
+    """
+    Creates traces and spans, tracking the current span in a context
+    variable so spans nest across awaits and into tasks created while a span
+    is active. Finished traces are handed to `exporter` on a background
+    thread, so exporting never blocks the event loop; if the export queue is
+    full the trace is dropped.
+    """
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0, max_queue: int = 1000):
+        self.exporter = exporter
+        self.sample_rate = sample_rate if exporter is not None else 0.0
+        self.dropped = 0
+        self._current: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+        self._queue: "queue.Queue[List[Span]]" = queue.Queue(maxsize=max_queue)
+        if exporter is not None:
+            threading.Thread(target=self._export_loop, name="trace-exporter", daemon=True).start()
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """
+        TRACE_EXPORTER: none (default), jsonl or otlp. TRACE_FILE is the JSONL
+        path, TRACE_OTLP_ENDPOINT the collector base URL, and TRACE_SAMPLE_RATE
+        the fraction of requests recorded (default 1.0 once an exporter is set).
+        """
+        kind = os.getenv("TRACE_EXPORTER", "none")
+        if kind == "jsonl":
+            exporter = JsonlExporter(os.getenv("TRACE_FILE", "traces.jsonl"))
+        elif kind == "otlp":
+            exporter = OTLPJsonExporter(os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318"))
+        elif kind == "none":
+            exporter = None
+        else:
+            raise ValueError(f"Unknown TRACE_EXPORTER {kind!r}; expected none, jsonl or otlp")
+        return cls(exporter, sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")))
+
+    def current(self):
+        """The active span (or unsampled stand-in), or None outside any trace."""
+        return self._current.get()
+
+    def current_trace_id(self) -> Optional[str]:
+        span = self._current.get()
+        return span.trace_id if span is not None else None
+
+    def start_trace(self, name: str, **attributes):
+        """Starts a new trace and returns its root span without activating it."""
+        trace = _Trace(self.sample_rate > 0 and random.random() < self.sample_rate)
+        if not trace.sampled:
+            return _UnsampledSpan(trace.trace_id)
+        return Span(trace, name, None, attributes)
+
+    def start_span(self, name: str, parent=None, **attributes):
+        """
+        Starts a child of `parent` (default: the current span) without
+        activating it; for code that can't hold a `with` block, such as async
+        generators that yield between start and end. Returns None when the
+        trace isn't sampled.
+        """
+        parent = parent if parent is not None else self._current.get()
+        if parent is None or not parent.sampled:
+            return None
+        return Span(parent.trace, name, parent.span_id, attributes)
+
+    def end_span(self, span, error: Optional[BaseException] = None):
+        if not isinstance(span, Span):
+            return
+        span.end_ns = time.time_ns()
+        if error is not None:
+            span.status = "error"
+            span.error = f"{type(error).__name__}: {error}"
+        trace = span.trace
+        if trace.flushed:
+            # Finished after its root (e.g. a cancelled worker): export alone
+            self._enqueue([span])
+            return
+        trace.spans.append(span)
+        if span.parent_id is None:
+            trace.flushed = True
+            self._enqueue(trace.spans)
+
+    def activate(self, span) -> "_Scope":
+        """Makes `span` current for the body of a `with` block without ending it; no-op for None."""
+        return _NULL_SCOPE if span is None else _Scope(self, span, end=False)
+
+    def trace(self, name: str, **attributes):
+        """
+        `with` block that starts, activates and ends a new root span, or joins
+        the current trace as a child span if one is active. Yields the span
+        (or the unsampled stand-in, which still carries the trace id).
+        """
+        current = self._current.get()
+        if current is not None:
+            span = self.start_span(name, current, **attributes)
+            return _NullScope(current) if span is None else _Scope(self, span, end=True)
+        return _Scope(self, self.start_trace(name, **attributes), end=True)
+
+    def span(self, name: str, parent=None, **attributes):
+        """`with` block recording a child span; yields None (and costs ~nothing) outside sampled traces."""
+        span = self.start_span(name, parent, **attributes)
+        return _NULL_SCOPE if span is None else _Scope(self, span, end=True)
+
+    def _enqueue(self, spans: List[Span]):
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            self.dropped += 1
+
+    def _export_loop(self):
+        while True:
+            spans = self._queue.get()
+            try:
+                self.exporter.export(spans)
+            except Exception:
+                self.dropped += 1
+            finally:
+                self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0):
+        """Waits (briefly) until queued traces have been exported; for tests and shutdown."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that opens a root span per HTTP request, named after the
+    matched route template, and returns its id in an X-Trace-Id header.
+    """
+
+    def __init__(self, app, tracer: Tracer):
+        self.app = app
+        self.tracer = tracer
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        with self.tracer.trace(f"{scope['method']} {scope['path']}", method=scope["method"]) as root:
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("status", message["status"])
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-trace-id", root.trace_id.encode())]
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                if isinstance(root, Span) and getattr(route, "path", None):
+                    root.name = f"{scope['method']} {route.path}"
+
+
+tracer = Tracer.from_env()
@@ -1,25 +1,306 @@
-import logging
+import asyncio
+import atexit
+import gzip
+import json
 import os
+import shutil
+import threading
+import time
+from collections import deque
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from backend.safety.audit_store import AuditStore
+
+FSYNC_POLICIES = ("always", "interval", "never")
+OVERFLOW_POLICIES = ("drop_newest", "drop_oldest", "block")
+
+# (unix time, agent, action, details) as captured on the request path
+_Event = Tuple[float, str, str, Dict[str, Any]]
+
 
 class AuditLogger:
-    def __init__(self, log_file: str = "audit_log.jsonl"):
+    """
+    Append-only JSONL audit log written by a background thread.
+
+    `log_event` only timestamps the event and appends it to a bounded
+    in-memory queue, so the request path never touches the file. The writer
+    thread drains the queue in batches (one write per batch), fsyncs according
+    to `fsync` ("always": after every batch, "interval": at most every
+    `fsync_interval` seconds, "never": left to the OS), and rotates the file
+    once it exceeds `max_bytes` or has been open for `rotate_interval`
+    seconds. Rotated files are gzipped in the background and only the newest
+    `backups` are kept.
+
+    When the queue is full, `overflow` decides what is lost: "drop_newest"
+    rejects the incoming event, "drop_oldest" discards the oldest queued one,
+    and "block" waits up to `block_timeout` seconds for room before dropping.
+    "block" never waits on an event loop thread, where it would stall every
+    request: there `log_event` drops like "drop_newest", and coroutines use
+    `alog_event`, which waits in an executor thread instead. Drops are
+    counted and written to the log as an "events_dropped" entry so gaps are
+    visible to auditors.
+
+    If a `store` is given, each batch is also inserted into it so events can
+    be queried by time, agent, action or session without scanning the files.
+
+    Serialisation happens on the writer thread: callers must not mutate
+    `details` after logging it.
+    """
+
+    def __init__(self, log_file: str = "audit_log.jsonl", max_queue: int = 10000, batch_size: int = 512,
+                 flush_interval: float = 0.2, fsync: str = "interval", fsync_interval: float = 1.0,
+                 max_bytes: int = 50 * 1024 * 1024, rotate_interval: float = 86400.0, backups: int = 14,
+                 overflow: str = "drop_newest", block_timeout: float = 0.05, store: Optional[AuditStore] = None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy {fsync!r}; expected one of {', '.join(FSYNC_POLICIES)}")
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow!r}; expected one of {', '.join(OVERFLOW_POLICIES)}")
         self.log_file = log_file
-        # Ensure log directory exists if needed, for now just root or specific dir
-        
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.store = store
+
+        self._queue: Deque[_Event] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._pending = 0  # events queued or being written, for flush()
+        self._dropped_unreported = 0
+        self._compressors: List[threading.Thread] = []
+        self.stats = {"logged": 0, "written": 0, "dropped": 0, "batches": 0, "fsyncs": 0, "rotations": 0, "errors": 0,
+                      "store_errors": 0}
+
+        self._file = None
+        self._file_bytes = 0
+        self._opened_at = 0.0
+        self._last_write = 0.0
+        self._last_fsync = 0.0
+
+    @classmethod
+    def from_env(cls) -> "AuditLogger":
+        return cls(
+            log_file=os.getenv("AUDIT_LOG_FILE", "audit_log.jsonl"),
+            max_queue=int(os.getenv("AUDIT_QUEUE_SIZE", "10000")),
+            fsync=os.getenv("AUDIT_FSYNC", "interval"),
+            max_bytes=int(os.getenv("AUDIT_MAX_MB", "50")) * 1024 * 1024,
+            rotate_interval=float(os.getenv("AUDIT_ROTATE_SECONDS", "86400")),
+            backups=int(os.getenv("AUDIT_BACKUPS", "14")),
+            overflow=os.getenv("AUDIT_OVERFLOW", "drop_newest"),
+            store=AuditStore.from_env(),
+        )
+
     def log_event(self, agent_name: str, action: str, details: Dict[str, Any]):
+        """Queues an agent event for the audit log. Only blocks under overflow="block", and never on an event loop."""
+        block = self.overflow == "block" and not _on_event_loop()
+        self._put((time.time(), agent_name, action, details), block)
+
+    async def alog_event(self, agent_name: str, action: str, details: Dict[str, Any]):
+        """log_event for coroutines: under overflow="block", waits for room in an executor thread, not on the loop."""
+        event = (time.time(), agent_name, action, details)
+        if self._put(event, block=False, final=self.overflow != "block"):
+            return
+        await asyncio.get_running_loop().run_in_executor(None, self._put, event, True)
+
+    def _put(self, event: _Event, block: bool, final: bool = True) -> bool:
         """
-        Logs an agent event to a structured log file.
+        Appends `event` to the queue, applying the overflow policy when it is
+        full. With `final` False, a full queue returns False without counting
+        a drop, so the caller can retry with block=True. Returns whether the
+        event was queued.
         """
-        entry = {
-            "timestamp": datetime.now().isoformat(),
-            "agent": agent_name,
+        with self._cond:
+            if self._thread is None:
+                self._start()
+            if len(self._queue) >= self.max_queue:
+                if self.overflow == "drop_oldest":
+                    self._queue.popleft()
+                    self._pending -= 1
+                    self._drop()
+                elif not (block and self._cond.wait_for(lambda: len(self._queue) < self.max_queue, self.block_timeout)):
+                    if final:
+                        self.stats["logged"] += 1
+                        self._drop()
+                    return False
+            self.stats["logged"] += 1
+            self._queue.append(event)
+            self._pending += 1
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+            return True
+
+    def _drop(self):
+        self.stats["dropped"] += 1
+        self._dropped_unreported += 1
+
+    def _start(self):
+        # Started lazily so creating a logger (e.g. per MasterAgent in tests
+        # and benchmarks) costs nothing until something is logged.
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Waits until every event queued so far has been written to the file."""
+        with self._cond:
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self, timeout: float = 5.0):
+        """Writes out the queue, stops the writer thread and closes the file. Logging again restarts it."""
+        with self._cond:
+            thread = self._thread
+            if thread is None:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        thread.join(timeout)
+        for compressor in list(self._compressors):
+            compressor.join(timeout)
+        with self._cond:
+            self._thread = None
+        atexit.unregister(self.close)
+
+    # --- writer thread ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: len(self._queue) >= self.batch_size or self._closed, self.flush_interval)
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+                dropped, self._dropped_unreported = self._dropped_unreported, 0
+                closing = self._closed and not self._queue
+                # Wake producers waiting for room under overflow="block"
+                self._cond.notify_all()
+
+            written = 0
+            if batch or dropped:
+                try:
+                    self._write(batch, dropped)
+                    written = len(batch)
+                except Exception:
+                    self.stats["errors"] += 1
+                if self.store is not None and batch:
+                    try:
+                        self.store.insert_many(batch)
+                    except Exception:
+                        self.stats["store_errors"] += 1
+            elif self._file is not None and self.fsync == "interval" and self._last_fsync < self._last_write:
+                self._sync()
+
+            with self._cond:
+                self._pending -= len(batch)
+                self.stats["written"] += written
+                self._cond.notify_all()
+            if closing:
+                self._close_file()
+                return
+
+    def _format(self, event: _Event) -> str:
+        timestamp, agent, action, details = event
+        return json.dumps({
+            "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+            "agent": agent,
             "action": action,
-            "details": details
-        }
-        
-        # In a real app, use a proper logging handler or database
-        # For demo, we'll just append to a file (simulated)
-        # print(f"[AUDIT] {entry}") # Print to console for demo visibility
-        pass
+            "details": details,
+        }, default=str) + "\n"
+
+    def _write(self, batch: List[_Event], dropped: int):
+        lines = [self._format(event) for event in batch]
+        if dropped:
+            lines.append(self._format((time.time(), "AuditLogger", "events_dropped", {"count": dropped})))
+        data = "".join(lines).encode("utf-8")
+
+        if self._file is None:
+            self._open()
+        if self._file_bytes and (self._file_bytes + len(data) > self.max_bytes
+                                 or time.time() - self._opened_at >= self.rotate_interval):
+            self._rotate()
+
+        self._file.write(data)
+        self._file.flush()
+        self._file_bytes += len(data)
+        self._last_write = time.monotonic()
+        self.stats["batches"] += 1
+        if self.fsync == "always" or (self.fsync == "interval" and self._last_write - self._last_fsync >= self.fsync_interval):
+            self._sync()
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+        self.stats["fsyncs"] += 1
+
+    def _open(self):
+        directory = os.path.dirname(self.log_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(self.log_file, "ab")
+        self._file_bytes = self._file.tell()
+        self._opened_at = time.time()
+
+    def _close_file(self):
+        if self._file is not None:
+            if self.fsync != "never":
+                self._sync()
+            self._file.close()
+            self._file = None
+
+    def _rotate(self):
+        self._close_file()
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        rotated = f"{self.log_file}.{stamp}"
+        suffix = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated = f"{self.log_file}.{stamp}.{suffix}"
+            suffix += 1
+        os.replace(self.log_file, rotated)
+        self.stats["rotations"] += 1
+        self._open()
+        # Compress off the writer thread so a large file doesn't stall the queue
+        compressor = threading.Thread(target=self._compress, args=(rotated,), name="audit-compress", daemon=True)
+        self._compressors.append(compressor)
+        compressor.start()
+
+    def _compress(self, path: str):
+        try:
+            with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(path + ".gz.tmp", path + ".gz")
+            os.remove(path)
+            self._prune()
+        except Exception:
+            self.stats["errors"] += 1
+        finally:
+            self._compressors.remove(threading.current_thread())
+
+    def _prune(self):
+        directory = os.path.dirname(self.log_file) or "."
+        prefix = os.path.basename(self.log_file) + "."
+        archives = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory)
+             if name.startswith(prefix) and name.endswith(".gz")),
+            key=os.path.getmtime,
+        )
+        for path in archives[:max(0, len(archives) - self.backups)]:
+            os.remove(path)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+# Process-wide audit log shared by every MasterAgent
+audit_logger = AuditLogger.from_env()
@@ -0,0 +1,150 @@
+import base64
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Every index ends in ts (and implicitly the rowid), so a filtered time range
+# is one index range scan and keyset pagination on (ts, id) never sorts or
+# skips rows, however large the table grows.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    agent TEXT NOT NULL,
+    action TEXT NOT NULL,
+    session_id TEXT,
+    query TEXT,
+    details TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit_events_ts ON audit_events (ts);
+CREATE INDEX IF NOT EXISTS audit_events_agent_ts ON audit_events (agent, ts);
+CREATE INDEX IF NOT EXISTS audit_events_action_ts ON audit_events (action, ts);
+CREATE INDEX IF NOT EXISTS audit_events_session_ts ON audit_events (session_id, ts) WHERE session_id IS NOT NULL;
+CREATE INDEX IF NOT EXISTS audit_events_query_ts ON audit_events (query, ts) WHERE query IS NOT NULL;
+"""
+
+FILTERS = ("agent", "action", "session_id", "query")
+
+
+def encode_cursor(ts: float, event_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{ts!r}:{event_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        ts, _, event_id = base64.urlsafe_b64decode(cursor.encode()).decode().partition(":")
+        return float(ts), int(event_id)
+    except ValueError:
+        raise ValueError(f"Invalid cursor {cursor!r}")
+
+
+class AuditStore:
+    """
+    SQLite (WAL mode) index of audit events for time, agent, action, session
+    and query lookups. Inserts come in batches from the AuditLogger writer
+    thread; queries run on per-thread connections and, thanks to WAL, never
+    wait on the writer.
+    """
+
+    def __init__(self, path: str = "audit.db"):
+        self.path = path
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    @classmethod
+    def from_env(cls) -> Optional["AuditStore"]:
+        """AUDIT_DB is the database path; set it to an empty string to disable the store."""
+        path = os.getenv("AUDIT_DB", "audit.db")
+        return cls(path) if path else None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # The database is created on first use, not at import time
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # With WAL, NORMAL only risks the last transactions on power loss,
+            # never corruption; the JSONL log carries its own fsync policy.
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            with self._init_lock:
+                if not self._initialized:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+            self._local.conn = conn
+        return conn
+
+    def insert_many(self, events: Iterable[Tuple[float, str, str, Dict[str, Any]]]):
+        """Inserts (unix time, agent, action, details) events in a single transaction."""
+        rows = []
+        for ts, agent, action, details in events:
+            session_id = details.get("session_id")
+            query = details.get("query")
+            rows.append((ts, agent, action, str(session_id) if session_id is not None else None,
+                         query if isinstance(query, str) else None, json.dumps(details, default=str)))
+        if not rows:
+            return
+        conn = self._connection()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO audit_events (ts, agent, action, session_id, query, details) VALUES (?, ?, ?, ?, ?, ?)",
+                rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, limit: int = 100,
+              cursor: Optional[str] = None, descending: bool = True, **filters: Optional[str]) -> Dict[str, Any]:
+        """
+        Events with start <= ts < end matching every given filter (agent,
+        action, session_id, query), newest first unless `descending` is False.
+        Returns {"events": [...], "next_cursor": str or None}; pass
+        next_cursor back to continue after the last event returned.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        for name, value in filters.items():
+            if name not in FILTERS:
+                raise ValueError(f"Unknown filter {name!r}; expected one of {', '.join(FILTERS)}")
+            if value is not None:
+                clauses.append(f"{name} = ?")
+                params.append(value)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(end)
+        if cursor:
+            ts, event_id = decode_cursor(cursor)
+            clauses.append("(ts, id) < (?, ?)" if descending else "(ts, id) > (?, ?)")
+            params += [ts, event_id]
+
+        direction = "DESC" if descending else "ASC"
+        sql = "SELECT id, ts, agent, action, details FROM audit_events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        # One extra row tells us whether another page exists
+        sql += f" ORDER BY ts {direction}, id {direction} LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._connection().execute(sql, params).fetchall()
+        page = rows[:limit]
+        events = [{
+            "id": event_id,
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+            "agent": agent,
+            "action": action,
+            "details": json.loads(details),
+        } for event_id, ts, agent, action, details in page]
+        next_cursor = encode_cursor(page[-1][1], page[-1][0]) if len(rows) > limit else None
+        return {"events": events, "next_cursor": next_cursor}
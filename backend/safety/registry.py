@@ -0,0 +1,256 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+DELTA_FILE = "delta.txt"
+PREFIXES = {"nct": "NCT", "patent": "US"}
+
+logger = logging.getLogger(__name__)
+
+
+def snapshot_file(kind: str) -> str:
+    return f"{kind}.u64"
+
+
+def parse_id(identifier: str) -> Tuple[str, int]:
+    """
+    Maps an identifier to (kind, uint64 key). NCT IDs key on their 8 digits;
+    patent numbers also encode the digit count (bits 40+) so "US0123456" and
+    "US123456" stay distinct.
+    """
+    identifier = identifier.strip()
+    for kind, prefix in PREFIXES.items():
+        if identifier.startswith(prefix) and identifier[len(prefix):].isdigit():
+            digits = identifier[len(prefix):]
+            return kind, encode(kind, digits)
+    raise ValueError(f"Unrecognized identifier {identifier!r}")
+
+
+def encode(kind: str, digits: str) -> int:
+    if kind == "patent":
+        return (len(digits) << 40) | int(digits)
+    return int(digits)
+
+
+def write_snapshot(path: str, kind: str, keys: np.ndarray):
+    """Writes sorted unique keys for `kind`, replacing the previous snapshot atomically."""
+    keys = np.unique(np.asarray(keys, dtype=np.uint64))
+    tmp = os.path.join(path, snapshot_file(kind) + ".tmp")
+    keys.tofile(tmp)
+    os.replace(tmp, os.path.join(path, snapshot_file(kind)))
+
+
+def build_registry(path: str, identifiers: Iterable[str], batch_size: int = 1_000_000) -> Dict[str, int]:
+    """Builds snapshots at `path` from an iterable of identifiers. Returns the key count per kind."""
+    os.makedirs(path, exist_ok=True)
+    batches: Dict[str, List[np.ndarray]] = {kind: [] for kind in PREFIXES}
+    pending: Dict[str, List[int]] = {kind: [] for kind in PREFIXES}
+    for identifier in identifiers:
+        if not identifier.strip():
+            continue
+        kind, key = parse_id(identifier)
+        keys = pending[kind]
+        keys.append(key)
+        if len(keys) >= batch_size:
+            batches[kind].append(np.unique(np.array(keys, dtype=np.uint64)))
+            pending[kind] = []
+    counts = {}
+    for kind in PREFIXES:
+        parts = batches[kind] + [np.array(pending[kind], dtype=np.uint64)]
+        keys = np.unique(np.concatenate(parts))
+        write_snapshot(path, kind, keys)
+        counts[kind] = len(keys)
+    # A fresh snapshot supersedes any pending deltas
+    open(os.path.join(path, DELTA_FILE), "w").close()
+    return counts
+
+
+class _State(NamedTuple):
+    """Everything a lookup reads, replaced as one object so readers never mix versions."""
+    versions: Dict[str, Tuple[int, int]]
+    snapshots: Dict[str, np.ndarray]
+    added: Dict[str, Set[int]]
+    removed: Dict[str, Set[int]]
+
+
+class RegistryIndex:
+    """
+    Existence check for trial IDs and patent numbers against local registry
+    snapshots.
+
+    Each kind is a file of sorted unique uint64 keys opened with numpy.memmap,
+    so opening is instant, resident memory is only the pages a lookup touches
+    (about log2(n) of them), and uvicorn workers on one host share the page
+    cache. Lookups are a binary search: O(log n), ~27 probes at 100M IDs.
+
+    Updates go in `delta.txt`, one "+ID" or "-ID" per line, applied in order
+    on top of the snapshot. The file is re-read when it changes (checked at
+    most every `refresh_interval` seconds), so additions and withdrawals take
+    effect without a rebuild; `compact` folds them into the snapshot.
+    Malformed delta lines (e.g. a half-written append) are logged and
+    skipped, never raised on the lookup path.
+
+    Lookups don't lock: refresh builds a complete new state and swaps it in
+    with one assignment.
+    """
+
+    def __init__(self, path: str, refresh_interval: float = 5.0):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self._lock = threading.Lock()
+        self._state = _State({}, {}, {kind: set() for kind in PREFIXES}, {kind: set() for kind in PREFIXES})
+        self._next_check = 0.0
+        self.bad_delta_lines = 0
+        self.refresh(force=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["RegistryIndex"]:
+        """REGISTRY_DIR holds the snapshots; unset means no registry (format checks only)."""
+        path = os.getenv("REGISTRY_DIR")
+        return cls(path, refresh_interval=float(os.getenv("REGISTRY_REFRESH_SECONDS", "5"))) if path else None
+
+    def _version(self, name: str) -> Tuple[int, int]:
+        try:
+            st = os.stat(os.path.join(self.path, name))
+        except FileNotFoundError:
+            return (0, 0)
+        return (st.st_mtime_ns, st.st_size)
+
+    def refresh(self, force: bool = False):
+        """Reopens snapshots and re-reads deltas that changed on disk since the last check."""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        with self._lock:
+            if not force and now < self._next_check:
+                return
+            self._next_check = now + self.refresh_interval
+            state = self._state
+            versions = dict(state.versions)
+            snapshots = dict(state.snapshots)
+            for kind in PREFIXES:
+                name = snapshot_file(kind)
+                version = self._version(name)
+                if force or version != versions.get(name):
+                    snapshots[kind] = self._open_snapshot(name, version)
+                    versions[name] = version
+            added, removed = state.added, state.removed
+            version = self._version(DELTA_FILE)
+            if force or version != versions.get(DELTA_FILE):
+                try:
+                    added, removed = self._read_delta()
+                    versions[DELTA_FILE] = version
+                except (OSError, ValueError) as e:
+                    # e.g. undecodable bytes mid-append; keep the old delta and retry next time
+                    logger.warning("Keeping the previous %s: %s", DELTA_FILE, e)
+            # Versions are only recorded with the data they describe, so a
+            # failed read is retried on the next refresh
+            self._state = _State(versions, snapshots, added, removed)
+
+    def _open_snapshot(self, name: str, version: Tuple[int, int]) -> np.ndarray:
+        if version[1] == 0:
+            return np.zeros(0, dtype=np.uint64)
+        return np.memmap(os.path.join(self.path, name), dtype=np.uint64, mode="r")
+
+    def _read_delta(self, strict: bool = False) -> Tuple[Dict[str, Set[int]], Dict[str, Set[int]]]:
+        """Parses the delta file. Bad lines are skipped with a warning, or raise ValueError if `strict`."""
+        added: Dict[str, Set[int]] = {kind: set() for kind in PREFIXES}
+        removed: Dict[str, Set[int]] = {kind: set() for kind in PREFIXES}
+        try:
+            f = open(os.path.join(self.path, DELTA_FILE), encoding="utf-8")
+        except FileNotFoundError:
+            return added, removed
+        with f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                op, identifier = line[0], line[1:]
+                try:
+                    if op not in "+-":
+                        raise ValueError(f"Bad delta line {line!r}; expected +ID or -ID")
+                    kind, key = parse_id(identifier)
+                except ValueError as e:
+                    if strict:
+                        raise
+                    self.bad_delta_lines += 1
+                    logger.warning("Skipping %s line %d: %s", DELTA_FILE, number, e)
+                    continue
+                # Later lines win: re-adding undoes a removal and vice versa
+                if op == "+":
+                    added[kind].add(key)
+                    removed[kind].discard(key)
+                else:
+                    removed[kind].add(key)
+                    added[kind].discard(key)
+        return added, removed
+
+    def __len__(self) -> int:
+        return sum(len(keys) for keys in self._state.snapshots.values())
+
+    def contains(self, kind: str, identifier: str) -> bool:
+        return bool(self.contains_many(kind, [identifier])[0])
+
+    def contains_many(self, kind: str, identifiers: Sequence[str]) -> np.ndarray:
+        """Boolean array: whether each `kind` identifier (e.g. "NCT01234567") is registered."""
+        self.refresh()
+        state = self._state  # one consistent snapshot + delta for the whole call
+        prefix = len(PREFIXES[kind])
+        keys = np.fromiter((encode(kind, i[prefix:]) for i in identifiers), dtype=np.uint64, count=len(identifiers))
+        snapshot = state.snapshots[kind]
+        found = np.zeros(len(keys), dtype=bool)
+        if len(snapshot):
+            positions = np.searchsorted(snapshot, keys)
+            inside = positions < len(snapshot)
+            found[inside] = snapshot[positions[inside]] == keys[inside]
+        added, removed = state.added[kind], state.removed[kind]
+        if added or removed:
+            for i, key in enumerate(keys.tolist()):
+                if key in added:
+                    found[i] = True
+                elif key in removed:
+                    found[i] = False
+        return found
+
+    def compact(self):
+        """Merges the deltas into new snapshots and empties the delta file. Refuses a delta with bad lines."""
+        with self._lock:
+            added, removed = self._read_delta(strict=True)
+            for kind in PREFIXES:
+                if not added[kind] and not removed[kind]:
+                    continue
+                keys = np.asarray(self._state.snapshots[kind])
+                if removed[kind]:
+                    keys = keys[~np.isin(keys, np.fromiter(removed[kind], dtype=np.uint64))]
+                keys = np.concatenate([keys, np.fromiter(added[kind], dtype=np.uint64)])
+                write_snapshot(self.path, kind, keys)
+            open(os.path.join(self.path, DELTA_FILE), "w").close()
+        self.refresh(force=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or compact the local trial/patent registry used by FactChecker.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Build snapshots from text files of identifiers, one per line")
+    build.add_argument("output", help="Registry directory (REGISTRY_DIR)")
+    build.add_argument("inputs", nargs="+")
+    compact = commands.add_parser("compact", help="Fold delta.txt into the snapshots")
+    compact.add_argument("path", help="Registry directory (REGISTRY_DIR)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        def identifiers():
+            for name in args.inputs:
+                with open(name) as f:
+                    yield from f
+        counts = build_registry(args.output, identifiers())
+        print(", ".join(f"{count} {kind}" for kind, count in counts.items()) + f" IDs in {args.output}")
+    else:
+        RegistryIndex(args.path).compact()
+        print(f"Compacted {args.path}")
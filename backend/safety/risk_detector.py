@@ -1,31 +1,170 @@
-from typing import List, Dict, Any
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.utils.patterns import KeywordMatcher
+
+DEFAULT_RISK_KEYWORDS = {
+    "safety": ["toxic", "hepatotoxic", "cardiotoxic", "nephrotoxic", "neurotoxic",
+               "adverse event", "side effect", "death", "fatal", "fatalities"],
+    "legal": ["litigation", "lawsuit", "infringement", "patent dispute"],
+    "market": ["recall", "withdrawn", "saturation", "competitor dominance"]
+}
+DEFAULT_SEVERITIES = {"safety": "High"}
+# Endings a term may carry and still match: plurals ("side effects",
+# "lawsuits") and -ity nouns ("toxicity"); reported as the listed term
+INFLECTIONS = ("s", "es", "ity")
+
 
 class RiskDetector:
-    def __init__(self):
-        self.risk_keywords = {
-            "safety": ["toxic", "adverse event", "side effect", "death", "fatal"],
-            "legal": ["litigation", "lawsuit", "infringement", "patent dispute"],
-            "market": ["recall", "withdrawn", "saturation", "competitor dominance"]
+    """
+    Scans text for risk terms from a categorized lexicon.
+
+    The whole lexicon is compiled once into a single KeywordMatcher, so a
+    scan is one pass over the text however many terms there are. Matching is
+    case-insensitive and whole-word, allowing the INFLECTIONS endings:
+    "side effect" matches "side effects" and "toxic" matches "toxicity", but
+    "recall" does not match "recalled". Offsets index into the text as given.
+    """
+
+    def __init__(self, risk_keywords: Optional[Dict[str, List[str]]] = None,
+                 severities: Optional[Dict[str, str]] = None, default_severity: str = "Medium",
+                 inflections: Iterable[str] = INFLECTIONS):
+        self.risk_keywords = risk_keywords if risk_keywords is not None else DEFAULT_RISK_KEYWORDS
+        self.severities = severities if severities is not None else DEFAULT_SEVERITIES
+        self.default_severity = default_severity
+
+        # A term listed under several categories is reported once per category
+        self._categories: Dict[str, List[str]] = {}
+        for category, keywords in self.risk_keywords.items():
+            for keyword in keywords:
+                categories = self._categories.setdefault(keyword.lower(), [])
+                if category not in categories:
+                    categories.append(category)
+        self._matcher = KeywordMatcher(self._categories, word_boundary=True, suffixes=inflections)
+        # Longest text a single match can span, suffix included
+        self.max_match_length = max(len(k) for k in self._categories) + self._matcher.max_suffix_length
+
+    @classmethod
+    def from_env(cls) -> "RiskDetector":
+        """RISK_LEXICON: optional JSON file of {category: [terms]} replacing the built-in lexicon."""
+        path = os.getenv("RISK_LEXICON")
+        if not path:
+            return cls()
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def severity(self, category: str) -> str:
+        return self.severities.get(category, self.default_severity)
+
+    def find(self, text: str, offset: int = 0) -> List[Dict[str, Any]]:
+        """Every risk-term occurrence as {"category", "keyword", "severity", "start", "end"}, in text order."""
+        # lower() keeps offsets aligned except for a handful of characters
+        # (e.g. "İ") whose lowercase form is longer; those only shift offsets.
+        lowered = text.lower()
+        matches = []
+        for start, end, keyword in self._matcher.finditer_spans(lowered):
+            for category in self._categories[keyword]:
+                matches.append({
+                    "category": category,
+                    "keyword": keyword,
+                    "severity": self.severity(category),
+                    "start": offset + start,
+                    "end": offset + end,
+                })
+        return matches
+
+    def summarize(self, matches: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """Groups matches into one risk per (category, keyword), with every offset, in order of first occurrence."""
+        risks: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        for match in matches:
+            key = (match["category"], match["keyword"])
+            risk = risks.get(key)
+            if risk is None:
+                risk = risks[key] = {
+                    "category": match["category"],
+                    "keyword": match["keyword"],
+                    "severity": match["severity"],
+                    "offsets": [],
+                }
+            risk["offsets"].append(match["start"])
+        found = list(risks.values())
+        return {
+            "has_risks": len(found) > 0,
+            "risks": found,
+            "summary": f"Detected {len(found)} potential risk factors." if found else "No significant risks detected."
         }
 
     def assess_risk(self, text: str) -> Dict[str, Any]:
         """
         Scans text for risk-related keywords and categorizes them.
         """
-        risks = []
-        text_lower = text.lower()
-        
-        for category, keywords in self.risk_keywords.items():
-            for keyword in keywords:
-                if keyword in text_lower:
-                    risks.append({
-                        "category": category,
-                        "keyword": keyword,
-                        "severity": "High" if category == "safety" else "Medium"
-                    })
-        
-        return {
-            "has_risks": len(risks) > 0,
-            "risks": risks,
-            "summary": f"Detected {len(risks)} potential risk factors." if risks else "No significant risks detected."
-        }
+        return self.summarize(self.find(text))
+
+    def assess_many(self, texts: Iterable[str]) -> List[Dict[str, Any]]:
+        """assess_risk for each text, reusing the compiled lexicon."""
+        find, summarize = self.find, self.summarize
+        return [summarize(find(text)) for text in texts]
+
+    def stream(self) -> "RiskStream":
+        """Incremental scanner for text that arrives in pieces, e.g. page by page from a PDF."""
+        return RiskStream(self)
+
+
+class RiskStream:
+    """
+    Feeds text chunk by chunk and reports matches with offsets into the
+    concatenated text. A term split across two chunks is still found: the last
+    `max_match_length` characters of each chunk are held back and rescanned
+    with the next one, so memory stays bounded whatever the document length.
+    """
+
+    def __init__(self, detector: RiskDetector):
+        self.detector = detector
+        self.matches: List[Dict[str, Any]] = []
+        self._tail = ""
+        self._tail_offset = 0  # absolute offset of _tail[0]
+        self._reported_until = 0  # matches starting before this were already reported
+        self._closed = False
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """Scans `chunk` and returns the matches that are now final."""
+        if self._closed:
+            raise ValueError("RiskStream is closed")
+        buffer = self._tail + chunk
+        # A match starting before `safe` can't grow into the next chunk, and
+        # the character after its longest possible extent (needed for the
+        # word-boundary check) is already in the buffer.
+        safe = len(buffer) - self.detector.max_match_length
+        if safe <= 0:
+            self._tail = buffer
+            return []
+        new = self._collect(buffer, limit=safe)
+        # Keep one character before `safe` for the next chunk's lookbehind
+        keep = safe - 1
+        self._tail = buffer[keep:]
+        self._tail_offset += keep
+        self._reported_until = self._tail_offset + 1
+        return new
+
+    def close(self) -> List[Dict[str, Any]]:
+        """Scans the held-back tail and returns its matches; the stream can't be fed afterwards."""
+        if self._closed:
+            return []
+        self._closed = True
+        new = self._collect(self._tail, limit=len(self._tail))
+        self._tail = ""
+        return new
+
+    def result(self) -> Dict[str, Any]:
+        """Closes the stream and returns the same summary assess_risk gives for the whole text."""
+        self.close()
+        return self.detector.summarize(self.matches)
+
+    def _collect(self, buffer: str, limit: int) -> List[Dict[str, Any]]:
+        new = [
+            m for m in self.detector.find(buffer, offset=self._tail_offset)
+            if self._reported_until <= m["start"] < self._tail_offset + limit
+        ]
+        self.matches.extend(new)
+        return new
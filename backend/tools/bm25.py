@@ -0,0 +1,110 @@
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 ranking.
+
+    Documents are tokenized once at ingest. Each term maps to a postings dict
+    of {internal doc number: term frequency}, so a query only touches the
+    postings of its own terms, never the whole collection. Documents can be
+    added and removed incrementally. Each document's length normalization is
+    precomputed (and refreshed once after the collection changes), so the
+    per-posting work in search is a single lookup and divide.
+
+    Not thread-safe: callers that search off the event loop serialize access.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = {}
+        self.doc_lengths: Dict[int, int] = {}
+        self.documents: Dict[int, Dict[str, Any]] = {}
+        self._doc_terms: Dict[int, Tuple[str, ...]] = {}
+        self._numbers: Dict[str, int] = {}  # external id -> internal doc number
+        self._next_number = 0
+        self._total_length = 0
+        # k1 * (1 - b + b * length / avg_length) per document; None when stale
+        self._norms: Optional[Dict[int, float]] = None
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._numbers
+
+    def add_documents(self, documents: Iterable[Dict[str, Any]], field: str = "content"):
+        """Indexes documents (dicts with an "id" and a text `field`). Re-adding an id replaces it."""
+        for doc in documents:
+            doc_id = doc["id"]
+            if doc_id in self._numbers:
+                self.remove_document(doc_id)
+
+            number = self._next_number
+            self._next_number += 1
+            counts = Counter(tokenize(doc.get(field, "")))
+            for term, tf in counts.items():
+                self.postings.setdefault(term, {})[number] = tf
+
+            length = sum(counts.values())
+            self.doc_lengths[number] = length
+            self._total_length += length
+            self._doc_terms[number] = tuple(counts)
+            self.documents[number] = doc
+            self._numbers[doc_id] = number
+        # The average length moved, so every document's normalization did too
+        self._norms = None
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Removes a document from the index. Returns False if it was not indexed."""
+        number = self._numbers.pop(doc_id, None)
+        if number is None:
+            return False
+        for term in self._doc_terms.pop(number):
+            postings = self.postings[term]
+            del postings[number]
+            if not postings:
+                del self.postings[term]
+        self._total_length -= self.doc_lengths.pop(number)
+        del self.documents[number]
+        self._norms = None
+        return True
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """Returns up to `k` (score, document) pairs, best first."""
+        n_docs = len(self.documents)
+        if not n_docs or k <= 0:
+            return []
+        norms = self._norms
+        if norms is None:
+            avg_length = self._total_length / n_docs or 1.0
+            k1, b = self.k1, self.b
+            norms = self._norms = {
+                number: k1 * (1 - b + b * length / avg_length) for number, length in self.doc_lengths.items()
+            }
+
+        scores: Dict[int, float] = {}
+        get = scores.get
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            weight = math.log(1 + (n_docs - df + 0.5) / (df + 0.5)) * (self.k1 + 1)
+            for number, tf in postings.items():
+                scores[number] = get(number, 0.0) + weight * tf / (tf + norms[number])
+
+        top = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(score, self.documents[number]) for number, score in top]
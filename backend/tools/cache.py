@@ -0,0 +1,126 @@
+import asyncio
+import functools
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from backend.monitoring.tracing import tracer
+
+# Default freshness per upstream source (seconds). Trial registries and patent
+# offices change slowly; web search results go stale fastest.
+DEFAULT_TTLS = {
+    "clinical_trials": 3600.0,
+    "patents": 86400.0,
+    "market_data": 3600.0,
+    "regulatory": 86400.0,
+    "web_search": 600.0,
+}
+
+
+class ToolCache:
+    """
+    TTL + LRU cache for tool calls with single-flight coalescing.
+
+    Concurrent misses for the same (source, query) share one upstream call:
+    the first caller starts it and everyone awaits the same task. Failed calls
+    are not cached. Queries are keyed exactly as given, since tool results
+    echo the query text back. Cached values are shared between callers and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_entries: int = 4096, ttls: Optional[Dict[str, float]] = None, default_ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def _counter(self, source: str) -> Dict[str, int]:
+        counter = self._stats.get(source)
+        if counter is None:
+            counter = self._stats[source] = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+        return counter
+
+    def _store(self, key: Tuple[str, str], value: Any):
+        ttl = self.ttls.get(key[0], self.default_ttl)
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._counter(evicted[0])["evictions"] += 1
+
+    async def get_or_call(self, source: str, query: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the cached result for (source, query), calling `fetch` at most once on a miss."""
+        key = (source, query)
+        counter = self._counter(source)
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                counter["hits"] += 1
+                return value
+            del self._entries[key]
+            counter["expired"] += 1
+
+        task = self._inflight.get(key)
+        if task is not None:
+            counter["coalesced"] += 1
+        else:
+            counter["misses"] += 1
+            task = asyncio.ensure_future(fetch())
+            self._inflight[key] = task
+
+            def settle(done: asyncio.Task):
+                self._inflight.pop(key, None)
+                if not done.cancelled() and done.exception() is None:
+                    self._store(key, done.result())
+
+            task.add_done_callback(settle)
+
+        # Shield so a caller that times out doesn't cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-source counters plus overall size and hit ratio, for monitoring."""
+        sources = {}
+        for source, counter in self._stats.items():
+            lookups = counter["hits"] + counter["misses"] + counter["coalesced"]
+            served = counter["hits"] + counter["coalesced"]
+            sources[source] = dict(counter, hit_ratio=round(served / lookups, 4) if lookups else 0.0)
+        # A coalesced lookup also avoided an upstream call, so it counts as a hit
+        hits = sum(c["hits"] + c["coalesced"] for c in self._stats.values())
+        lookups = sum(c["hits"] + c["misses"] + c["coalesced"] for c in self._stats.values())
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "sources": sources,
+        }
+
+
+# Process-wide cache shared by every worker's tool calls
+tool_cache = ToolCache(max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "4096")))
+
+
+def cached_tool(source: str):
+    """Decorates an async `fn(query)` tool call so it goes through `tool_cache`."""
+    def decorator(fn: Callable[[str], Awaitable[Any]]):
+        async def upstream(query: str):
+            # Only recorded on a miss: a tool span without this child was served from cache
+            with tracer.span(f"upstream.{source}"):
+                return await fn(query)
+
+        @functools.wraps(fn)
+        async def wrapper(query: str):
+            with tracer.span(f"tool.{source}"):
+                return await tool_cache.get_or_call(source, query, lambda: upstream(query))
+        return wrapper
+    return decorator
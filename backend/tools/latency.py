@@ -0,0 +1,145 @@
+import asyncio
+import json
+import math
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+# Built-in profiles, selected with TOOL_LATENCY=<name>. "fixed" reproduces
+# the original hard-coded sleeps; "realistic" gives each upstream a long
+# right tail, an occasional error and a hard timeout.
+PRESETS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "fixed": {
+        "default": {"kind": "fixed", "delay": 0.5},
+        "rag": {"kind": "fixed", "delay": 0.3},
+    },
+    "zero": {
+        "default": {"kind": "zero"},
+    },
+    "realistic": {
+        "default": {"kind": "lognormal", "median": 0.4, "sigma": 0.6, "error_rate": 0.01, "timeout": 4.0},
+        "clinical_trials": {"kind": "lognormal", "median": 0.45, "sigma": 0.7, "error_rate": 0.01, "timeout": 4.0},
+        "patents": {"kind": "lognormal", "median": 0.6, "sigma": 0.8, "error_rate": 0.02, "timeout": 4.0},
+        "market_data": {"kind": "lognormal", "median": 0.3, "sigma": 0.5, "error_rate": 0.01, "timeout": 4.0},
+        "regulatory": {"kind": "lognormal", "median": 0.5, "sigma": 0.7, "error_rate": 0.01, "timeout": 4.0},
+        "web_search": {"kind": "lognormal", "median": 0.25, "sigma": 0.6, "error_rate": 0.02, "timeout": 4.0},
+        "rag": {"kind": "lognormal", "median": 0.15, "sigma": 0.5, "timeout": 2.0},
+    },
+}
+
+
+class ToolError(Exception):
+    """Injected upstream failure."""
+
+
+class ToolTimeout(ToolError, TimeoutError):
+    """Injected upstream call that exceeded its profile's timeout."""
+
+
+class LatencyProfile:
+    """
+    Delay distribution for one tool.
+
+    kind: "zero", "fixed" (`delay` seconds), "lognormal" (`median` seconds,
+    log-space `sigma`) or "recorded" (resampled from `samples`, a list of
+    seconds, or `file`, a JSON list or one value per line). `error_rate` is
+    the probability a call fails after its delay; a call whose delay would
+    exceed `timeout` fails with ToolTimeout once `timeout` has elapsed.
+    """
+
+    KINDS = ("zero", "fixed", "lognormal", "recorded")
+
+    def __init__(self, kind: str = "zero", delay: float = 0.0, median: float = 0.0, sigma: float = 0.0,
+                 samples: Optional[List[float]] = None, file: Optional[str] = None,
+                 error_rate: float = 0.0, timeout: Optional[float] = None):
+        if kind not in self.KINDS:
+            raise ValueError(f"Unknown latency kind {kind!r}; expected one of {', '.join(self.KINDS)}")
+        if kind == "recorded":
+            samples = list(samples or []) + (self._load_samples(file) if file else [])
+            if not samples:
+                raise ValueError("A recorded latency profile needs samples or a file")
+        self.kind = kind
+        self.delay = delay
+        self.median = median
+        self.sigma = sigma
+        self.samples = samples or []
+        self.error_rate = error_rate
+        self.timeout = timeout
+
+    @staticmethod
+    def _load_samples(path: str) -> List[float]:
+        with open(path) as f:
+            data = f.read().strip()
+        if data.startswith("["):
+            return [float(v) for v in json.loads(data)]
+        return [float(line) for line in data.splitlines() if line.strip()]
+
+    def sample(self, rng: random.Random) -> float:
+        """Draws one delay in seconds."""
+        if self.kind == "fixed":
+            return self.delay
+        if self.kind == "lognormal":
+            return self.median * math.exp(self.sigma * rng.gauss(0.0, 1.0))
+        if self.kind == "recorded":
+            return rng.choice(self.samples)
+        return 0.0
+
+
+class LatencyModel:
+    """Per-tool latency profiles with a shared, optionally seeded RNG."""
+
+    def __init__(self, profiles: Dict[str, LatencyProfile], seed: Optional[int] = None, name: str = "custom"):
+        self.profiles = profiles
+        self.default = profiles.get("default", LatencyProfile())
+        self.name = name
+        self.rng = random.Random(seed)
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Dict[str, Any]], seed: Optional[int] = None, name: str = "custom") -> "LatencyModel":
+        """Builds a model from {tool: {"kind": ..., ...}}; the "default" entry covers unlisted tools."""
+        return cls({tool: LatencyProfile(**params) for tool, params in spec.items()}, seed=seed, name=name)
+
+    @classmethod
+    def from_env(cls) -> "LatencyModel":
+        """
+        TOOL_LATENCY is a preset name (fixed, zero, realistic) or the path to a
+        JSON file in from_spec format. TOOL_LATENCY_SEED makes runs repeatable.
+        """
+        selected = os.getenv("TOOL_LATENCY", "fixed")
+        seed = os.getenv("TOOL_LATENCY_SEED")
+        seed = int(seed) if seed else None
+        if selected in PRESETS:
+            return cls.from_spec(PRESETS[selected], seed=seed, name=selected)
+        with open(selected) as f:
+            return cls.from_spec(json.load(f), seed=seed, name=os.path.basename(selected))
+
+    def profile(self, tool: str) -> LatencyProfile:
+        return self.profiles.get(tool, self.default)
+
+    async def simulate(self, tool: str):
+        """Sleeps for one sampled delay of `tool`, raising injected errors and timeouts."""
+        profile = self.profile(tool)
+        delay = profile.sample(self.rng)
+        if profile.timeout is not None and delay > profile.timeout:
+            await asyncio.sleep(profile.timeout)
+            raise ToolTimeout(f"{tool} timed out after {profile.timeout:g}s")
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if profile.error_rate and self.rng.random() < profile.error_rate:
+            raise ToolError(f"{tool} returned an error")
+
+
+# Chosen once at startup; benchmarks may swap it with use_latency_model()
+latency_model = LatencyModel.from_env()
+
+
+def use_latency_model(model: LatencyModel) -> LatencyModel:
+    """Replaces the process-wide latency model and returns the previous one."""
+    global latency_model
+    previous, latency_model = latency_model, model
+    return previous
+
+
+async def simulate_latency(tool: str):
+    """Applies the current latency model to one call of `tool`."""
+    await latency_model.simulate(tool)
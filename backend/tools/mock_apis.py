@@ -1,12 +1,14 @@
-import asyncio
 import random
 from typing import List, Dict, Any
+from backend.tools.cache import cached_tool
+from backend.tools.latency import simulate_latency
 
 class MockTools:
     @staticmethod
+    @cached_tool("clinical_trials")
     async def search_clinical_trials(query: str) -> Dict[str, Any]:
         """Simulates searching ClinicalTrials.gov"""
-        await asyncio.sleep(0.5)
+        await simulate_latency("clinical_trials")
         return {
             "source": "ClinicalTrials.gov",
             "count": 45,
@@ -18,9 +20,10 @@ class MockTools:
         }
 
     @staticmethod
+    @cached_tool("patents")
     async def search_patents(query: str) -> Dict[str, Any]:
         """Simulates searching USPTO/Lens.org"""
-        await asyncio.sleep(0.5)
+        await simulate_latency("patents")
         return {
             "source": "USPTO",
             "count": 12,
@@ -29,9 +32,10 @@ class MockTools:
         }
 
     @staticmethod
+    @cached_tool("market_data")
     async def search_market_data(query: str) -> Dict[str, Any]:
         """Simulates market research API"""
-        await asyncio.sleep(0.5)
+        await simulate_latency("market_data")
         return {
             "cagr": "12.5%",
             "peak_sales": "$1.2B",
@@ -39,9 +43,10 @@ class MockTools:
         }
 
     @staticmethod
+    @cached_tool("regulatory")
     async def check_regulatory_guidelines(query: str) -> Dict[str, Any]:
         """Simulates FDA/EMA guideline retrieval"""
-        await asyncio.sleep(0.5)
+        await simulate_latency("regulatory")
         return {
             "pathway": "505(b)(2)",
             "risk_level": "Low",
@@ -49,9 +54,10 @@ class MockTools:
         }
 
     @staticmethod
+    @cached_tool("web_search")
     async def web_search(query: str) -> List[str]:
         """Simulates generic web search"""
-        await asyncio.sleep(0.5)
+        await simulate_latency("web_search")
         return [
             f"Recent Phase 3 clinical trial results published in Nature Medicine demonstrate significant efficacy for {query.split(' ')[-1] if ' ' in query else query} in target indication.",
             "Leading industry analysts project strong market uptake due to unmet medical need.",
@@ -1,21 +1,78 @@
 import asyncio
-from typing import List, Dict
+import os
+import threading
+from typing import List, Dict, Any, Iterable, Optional
+from backend.tools.bm25 import BM25Index
+from backend.tools.vector_index import DenseVectorIndex
+from backend.tools.latency import simulate_latency
+from backend.monitoring.tracing import tracer
+
+# Optional on-disk dense index (built with `python -m backend.tools.vector_index`)
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", "")
+
+# Reciprocal rank fusion constant for merging lexical and dense rankings
+RRF_K = 60
 
 class RAGSystem:
-    def __init__(self):
+    def __init__(self, vector_index_path: Optional[str] = None):
         self.documents = [
             {"id": "doc1", "content": "Internal Lab Note 101: Metformin reduces tau phosphorylation in murine models."},
             {"id": "doc2", "content": "Confidential Memo: Intranasal delivery bypasses BBB effectively."},
             {"id": "doc3", "content": "Clinical Strategy 2025: Focus on neuroinflammation targets."}
         ]
+        self.index = BM25Index()
+        self.index.add_documents(self.documents)
+        # BM25 search runs in a worker thread; this keeps ingest from mutating the index under it
+        self._lock = threading.Lock()
+
+        path = vector_index_path if vector_index_path is not None else VECTOR_INDEX_PATH
+        self.vector_index = DenseVectorIndex(path) if path else None
+
+    def add_documents(self, documents: Iterable[Dict[str, Any]]):
+        """Indexes additional documents (dicts with "id" and "content")."""
+        with self._lock:
+            self.index.add_documents(documents)
+
+    def remove_document(self, doc_id: str) -> bool:
+        """Drops a document from the index, and from the defaults returned when nothing matches."""
+        with self._lock:
+            self.documents = [doc for doc in self.documents if doc["id"] != doc_id]
+            return self.index.remove_document(doc_id)
+
+    def _search(self, query: str, top_k: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [doc for _, doc in self.index.search(query, k=top_k)]
+
+    def _fuse(self, rankings: List[List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+        """Reciprocal rank fusion of several best-first document lists."""
+        scores: Dict[str, float] = {}
+        docs: Dict[str, Dict[str, Any]] = {}
+        for ranking in rankings:
+            for rank, doc in enumerate(ranking):
+                scores[doc["id"]] = scores.get(doc["id"], 0.0) + 1.0 / (RRF_K + rank + 1)
+                docs.setdefault(doc["id"], doc)
+        best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return [docs[doc_id] for doc_id in best]
+
+    async def retrieve(self, query: str, top_k: int = 5) -> List[Dict[str, str]]:
+        """Returns the `top_k` internal documents most relevant to `query`."""
+        with tracer.span("rag.retrieve", top_k=top_k):
+            return await self._retrieve(query, top_k)
+
+    async def _retrieve(self, query: str, top_k: int) -> List[Dict[str, str]]:
+        await simulate_latency("rag") # Simulated retrieval latency
+        # Lexical BM25 ranking over the inverted index, best match first. Pure
+        # Python over every posting of the query terms, so off the event loop.
+        results = await asyncio.to_thread(self._search, query, top_k)
+
+        if self.vector_index is not None:
+            # Semantic matches from the memory-mapped dense index; the scan
+            # is synchronous numpy work, so it runs off the event loop
+            hits = await asyncio.to_thread(self.vector_index.search, query, top_k)
+            semantic = [doc for _, doc in hits]
+            results = self._fuse([results, semantic], top_k)
 
-    async def retrieve(self, query: str) -> List[Dict[str, str]]:
-        """Simulates vector retrieval"""
-        await asyncio.sleep(0.3)
-        # Simple keyword matching for simulation
-        results = [doc for doc in self.documents if any(word in doc['content'].lower() for word in query.lower().split())]
-        
         if not results:
-            return [self.documents[0]] # Return default if no match
-            
+            return self.documents[:1] # Return default if no match
+
         return results
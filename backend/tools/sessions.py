@@ -0,0 +1,127 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from backend.tools.bm25 import BM25Index
+
+
+def chunk_text(text: str, size: int = 800, overlap: int = 100) -> List[str]:
+    """
+    Splits text into ~`size`-character chunks on whitespace, with `overlap`
+    characters carried into the next chunk so passages aren't cut in half.
+    """
+    text = text.strip()
+    if len(text) <= size:
+        return [text] if text else []
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            # Back off to the last whitespace so words stay whole
+            space = text.rfind(" ", start + size // 2, end)
+            if space != -1:
+                end = space
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [c for c in chunks if c]
+
+
+class SessionIndex:
+    def __init__(self):
+        self.index = BM25Index()
+        self.documents: Dict[str, Dict[str, Any]] = {}  # document_id -> {"filename", "chunks"}
+        self.last_used = time.monotonic()
+        # Guards this session's index; held while a document is indexed
+        self.lock = threading.Lock()
+
+
+class SessionDocumentStore:
+    """
+    Per-session retrieval indexes for uploaded documents. Each upload is
+    chunked and added to its session's BM25 index once, server-side, so chat
+    requests carry only the query and retrieval returns the top-k chunks.
+    Sessions are evicted least-recently-used past `max_sessions` or after
+    `idle_ttl` seconds without use.
+
+    Thread-safe, and meant to be called off the event loop (asyncio.to_thread)
+    for ingest and search. The store lock only covers the session table; each
+    session has its own lock for its index, so indexing a large upload only
+    holds up searches in that same session.
+    """
+
+    def __init__(self, max_sessions: int = 1000, idle_ttl: float = 4 * 3600, chunk_size: int = 800, chunk_overlap: int = 100):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._sessions: "OrderedDict[str, SessionIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "SessionDocumentStore":
+        return cls(
+            max_sessions=int(os.getenv("SESSION_MAX", "1000")),
+            idle_ttl=float(os.getenv("SESSION_IDLE_TTL", str(4 * 3600))),
+        )
+
+    def _evict(self):
+        """Drops idle and excess sessions. Caller holds the store lock."""
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.last_used >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[session_id]
+
+    def _get(self, session_id: str, create: bool = False) -> Optional[SessionIndex]:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None and create:
+                session = self._sessions[session_id] = SessionIndex()
+            if session is not None:
+                session.last_used = time.monotonic()
+                self._sessions.move_to_end(session_id)
+            self._evict()
+            return session
+
+    def ingest(self, session_id: str, document_id: str, text: str, filename: str = "") -> int:
+        """Chunks and indexes a document into a session. Re-ingesting the same document is a no-op. Returns its chunk count."""
+        chunks = chunk_text(text, self.chunk_size, self.chunk_overlap)
+        session = self._get(session_id, create=True)
+        with session.lock:
+            if document_id in session.documents:
+                return session.documents[document_id]["chunks"]
+            session.index.add_documents(
+                {"id": f"{document_id}:{i}", "document_id": document_id, "filename": filename, "chunk": i, "content": chunk}
+                for i, chunk in enumerate(chunks)
+            )
+            # Published last, so has_documents turns true only once the index is complete
+            session.documents[document_id] = {"filename": filename, "chunks": len(chunks)}
+        return len(chunks)
+
+    def has_documents(self, session_id: Optional[str]) -> bool:
+        """Lock-free (single dict reads), so it is cheap to call on the event loop."""
+        if not session_id:
+            return False
+        session = self._sessions.get(session_id)
+        return bool(session and session.documents)
+
+    def search(self, session_id: str, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Returns the top-k chunks from the session's documents, best first, each with its BM25 score."""
+        session = self._get(session_id)
+        if session is None:
+            return []
+        with session.lock:
+            return [dict(doc, score=round(score, 4)) for score, doc in session.index.search(query, k)]
+
+    def list_documents(self, session_id: str) -> Dict[str, Dict[str, Any]]:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return {}
+        with session.lock:
+            return dict(session.documents)
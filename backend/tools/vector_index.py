@@ -0,0 +1,301 @@
+import json
+import math
+import os
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.tools.bm25 import tokenize
+
+VECTORS_FILE = "vectors.f32"
+OFFSETS_FILE = "offsets.u64"
+DOCUMENTS_FILE = "documents.jsonl"
+META_FILE = "meta.json"
+CENTROIDS_FILE = "ivf_centroids.f32"
+LISTS_FILE = "ivf_lists.u64"
+
+
+class HashingEmbedder:
+    """
+    Offline text embedder using the hashing trick: unigrams and bigrams are
+    hashed (CRC32, stable across processes) into `dim` signed buckets with
+    sublinear tf weighting, then L2-normalized. No model download needed, and
+    vectors built by one process are comparable in every other.
+    """
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(feature)
+        if bucket is None:
+            h = zlib.crc32(feature.encode("utf-8"))
+            bucket = (h % self.dim, 1.0 if h & 0x80000000 else -1.0)
+            if len(self._buckets) < 1_000_000:
+                self._buckets[feature] = bucket
+        return bucket
+
+    def embed_into(self, text: str, out: np.ndarray):
+        out[:] = 0.0
+        tokens = tokenize(text)
+        features = Counter(tokens)
+        features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+        for feature, tf in features.items():
+            index, sign = self._bucket(feature)
+            out[index] += sign * (1.0 + math.log(tf))
+        norm = float(np.linalg.norm(out))
+        if norm > 0:
+            out /= norm
+
+    def embed(self, text: str) -> np.ndarray:
+        """Returns a unit-length float32 vector for `text`."""
+        vector = np.zeros(self.dim, dtype=np.float32)
+        self.embed_into(text, vector)
+        return vector
+
+    def embed_many(self, texts: Sequence[str]) -> np.ndarray:
+        """Returns an (n, dim) float32 matrix, one row per text."""
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in zip(matrix, texts):
+            self.embed_into(text, row)
+        return matrix
+
+
+class VectorIndexWriter:
+    """
+    Appends documents and their vectors to an on-disk index directory:
+    a contiguous row-major float32 matrix, a JSONL file of document payloads
+    and a (count, 2) uint64 array of payload (offset, length) pairs.
+    """
+
+    def __init__(self, path: str, embedder: Optional[HashingEmbedder] = None):
+        self.path = path
+        self.embedder = embedder or HashingEmbedder()
+        os.makedirs(path, exist_ok=True)
+        self.count = 0
+        self._vectors = open(os.path.join(path, VECTORS_FILE), "wb")
+        self._offsets = open(os.path.join(path, OFFSETS_FILE), "wb")
+        self._documents = open(os.path.join(path, DOCUMENTS_FILE), "wb")
+
+    def add_documents(self, documents: Sequence[Dict[str, Any]], field: str = "content"):
+        vectors = self.embedder.embed_many([doc.get(field, "") for doc in documents])
+        self._vectors.write(vectors.tobytes())
+        offsets = np.empty((len(documents), 2), dtype=np.uint64)
+        for i, doc in enumerate(documents):
+            payload = json.dumps(doc).encode("utf-8") + b"\n"
+            offsets[i] = (self._documents.tell(), len(payload))
+            self._documents.write(payload)
+        self._offsets.write(offsets.tobytes())
+        self.count += len(documents)
+
+    def close(self):
+        for f in (self._vectors, self._offsets, self._documents):
+            f.close()
+        with open(os.path.join(self.path, META_FILE), "w") as f:
+            json.dump({"dim": self.embedder.dim, "count": self.count, "embedder": "hashing-crc32-uni-bi"}, f)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def build_vector_index(path: str, documents: Iterable[Dict[str, Any]], dim: int = 256, batch_size: int = 10000) -> int:
+    """Builds an index at `path` from an iterable of {"id", "content"} dicts. Returns the row count."""
+    with VectorIndexWriter(path, HashingEmbedder(dim)) as writer:
+        batch: List[Dict[str, Any]] = []
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                writer.add_documents(batch)
+                batch = []
+        if batch:
+            writer.add_documents(batch)
+        return writer.count
+
+
+def build_ivf(path: str, n_lists: Optional[int] = None, sample_size: int = 65536, iterations: int = 10,
+              block_rows: int = 262144, seed: int = 0) -> int:
+    """
+    Adds an inverted-file (IVF) layer to an existing index so queries scan a
+    few clusters instead of every row. Trains spherical k-means centroids on a
+    sample, then rewrites the vector matrix and payload offsets grouped by
+    nearest centroid, so each cluster is one contiguous slice of the memmap.
+    Returns the number of lists.
+    """
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    count, dim = meta["count"], meta["dim"]
+    if count == 0:
+        return 0
+    n_lists = min(n_lists or max(1, int(math.sqrt(count))), count)
+    vectors = np.memmap(os.path.join(path, VECTORS_FILE), dtype=np.float32, mode="r", shape=(count, dim))
+    offsets = np.memmap(os.path.join(path, OFFSETS_FILE), dtype=np.uint64, mode="r", shape=(count, 2))
+
+    rng = np.random.default_rng(seed)
+    sample = np.asarray(vectors[np.sort(rng.choice(count, min(sample_size, count), replace=False))])
+    centroids = sample[rng.choice(len(sample), n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        filled = norms[:, 0] > 0
+        centroids[filled] = sums[filled] / norms[filled]
+
+    assign = np.empty(count, dtype=np.int64)
+    for start in range(0, count, block_rows):
+        assign[start:start + block_rows] = np.argmax(vectors[start:start + block_rows] @ centroids.T, axis=1)
+    order = np.argsort(assign, kind="stable")
+    lists = np.zeros(n_lists + 1, dtype=np.uint64)
+    lists[1:] = np.cumsum(np.bincount(assign, minlength=n_lists))
+
+    # Write the regrouped files beside the originals, then swap them in
+    for name, source, dtype in ((VECTORS_FILE, vectors, np.float32), (OFFSETS_FILE, offsets, np.uint64)):
+        tmp = os.path.join(path, name + ".tmp")
+        with open(tmp, "wb") as f:
+            for start in range(0, count, block_rows):
+                f.write(np.ascontiguousarray(source[order[start:start + block_rows]], dtype=dtype).tobytes())
+        os.replace(tmp, os.path.join(path, name))
+    centroids.astype(np.float32).tofile(os.path.join(path, CENTROIDS_FILE))
+    lists.tofile(os.path.join(path, LISTS_FILE))
+
+    meta["ivf_lists"] = n_lists
+    with open(os.path.join(path, META_FILE), "w") as f:
+        json.dump(meta, f)
+    return n_lists
+
+
+class DenseVectorIndex:
+    """
+    Read-only view of an index directory built by VectorIndexWriter.
+
+    The vector matrix and payload offsets are opened with numpy.memmap in
+    read-only mode, so the OS page cache backs them: opening is instant,
+    resident memory stays small, and several uvicorn workers on one host
+    share the same physical pages. Search scans the matrix in row blocks
+    (matrix multiply + argpartition per block) and merges the block winners.
+    If the index has an IVF layer (see build_ivf) only the `nprobe` clusters
+    nearest the query are scanned.
+    """
+
+    def __init__(self, path: str, block_rows: int = 262144, nprobe: int = 16):
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+        self.path = path
+        self.dim = meta["dim"]
+        self.count = meta["count"]
+        self.block_rows = block_rows
+        self.nprobe = nprobe
+        self.embedder = HashingEmbedder(self.dim)
+        if self.count:
+            self.vectors = np.memmap(os.path.join(path, VECTORS_FILE), dtype=np.float32, mode="r", shape=(self.count, self.dim))
+            self.offsets = np.memmap(os.path.join(path, OFFSETS_FILE), dtype=np.uint64, mode="r", shape=(self.count, 2))
+        else:
+            self.vectors = np.zeros((0, self.dim), dtype=np.float32)
+            self.offsets = np.zeros((0, 2), dtype=np.uint64)
+
+        self.centroids = None
+        self.lists = None
+        n_lists = meta.get("ivf_lists")
+        if n_lists:
+            self.centroids = np.fromfile(os.path.join(path, CENTROIDS_FILE), dtype=np.float32).reshape(n_lists, self.dim)
+            self.lists = np.fromfile(os.path.join(path, LISTS_FILE), dtype=np.uint64).astype(np.int64)
+        self._documents = open(os.path.join(path, DOCUMENTS_FILE), "rb")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        self._documents.close()
+
+    def get_document(self, row: int) -> Dict[str, Any]:
+        """Reads one document payload from disk by row number."""
+        offset, length = (int(v) for v in self.offsets[row])
+        return json.loads(os.pread(self._documents.fileno(), length, offset))
+
+    @staticmethod
+    def _merge_top_k(rows: np.ndarray, scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        if scores.shape[1] > k:
+            keep = np.argpartition(scores, -k, axis=1)[:, -k:]
+            rows = np.take_along_axis(rows, keep, axis=1)
+            scores = np.take_along_axis(scores, keep, axis=1)
+        return rows, scores
+
+    def _scan(self, queries: np.ndarray, ranges: List[Tuple[int, int]], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k of `queries` against the given [start, end) row ranges, unsorted."""
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        for range_start, range_end in ranges:
+            for start in range(range_start, range_end, self.block_rows):
+                block = self.vectors[start:min(start + self.block_rows, range_end)]
+                scores = queries @ block.T  # (q, block)
+                rows = np.broadcast_to(np.arange(start, start + len(block)), scores.shape)
+                rows, scores = self._merge_top_k(rows, scores, k)
+                best_rows, best_scores = self._merge_top_k(
+                    np.concatenate([best_rows, rows], axis=1),
+                    np.concatenate([best_scores, scores], axis=1), k)
+        return best_rows, best_scores
+
+    def search_vectors(self, queries: np.ndarray, k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k by inner product for a (q, dim) batch of unit query vectors.
+        Returns (rows, scores), each shaped (q, k'), best first, k' <= k. With
+        IVF, a query with fewer than k' candidates in its probed clusters is
+        padded at the end with row -1 and score -inf.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        k = min(k, self.count)
+        if k <= 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        if self.centroids is None or self.nprobe >= len(self.centroids):
+            # Flat scan: one batched matmul per block serves every query
+            rows, scores = self._scan(queries, [(0, self.count)], k)
+        else:
+            # IVF: each query only scans its nearest clusters
+            probes = np.argpartition(queries @ self.centroids.T, -self.nprobe, axis=1)[:, -self.nprobe:]
+            results = []
+            for query, lists in zip(queries, probes):
+                ranges = [(self.lists[l], self.lists[l + 1]) for l in np.sort(lists)]
+                results.append(self._scan(query[None, :], ranges, k))
+            # A query whose clusters hold fewer than k rows is padded (row -1,
+            # score -inf) to the batch width rather than trimming the others
+            width = max(r.shape[1] for r, _ in results)
+            rows = np.full((len(queries), width), -1, dtype=np.int64)
+            scores = np.full((len(queries), width), -np.inf, dtype=np.float32)
+            for i, (r, s) in enumerate(results):
+                rows[i, :r.shape[1]] = r[0]
+                scores[i, :s.shape[1]] = s[0]
+
+        order = np.argsort(-scores, axis=1, kind="stable")
+        return np.take_along_axis(rows, order, axis=1), np.take_along_axis(scores, order, axis=1)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[float, Dict[str, Any]]]:
+        """Returns up to `k` (similarity, document) pairs for a text query, best first."""
+        rows, scores = self.search_vectors(self.embedder.embed(query)[None, :], k)
+        return [(float(score), self.get_document(int(row))) for row, score in zip(rows[0], scores[0])
+                if row >= 0 and score > 0]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a dense vector index from a JSONL file of {\"id\", \"content\"} documents.")
+    parser.add_argument("documents", help="Input JSONL file")
+    parser.add_argument("output", help="Index directory to create")
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--ivf-lists", type=int, default=0, help="Cluster count for the IVF layer (0 = none, -1 = sqrt(rows))")
+    args = parser.parse_args()
+
+    with open(args.documents) as f:
+        rows = build_vector_index(args.output, (json.loads(line) for line in f if line.strip()), dim=args.dim)
+    print(f"Indexed {rows} documents into {args.output}")
+    if args.ivf_lists:
+        lists = build_ivf(args.output, None if args.ivf_lists < 0 else args.ivf_lists)
+        print(f"Built IVF layer with {lists} lists")
@@ -0,0 +1,132 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+class ExtractionCache:
+    """
+    Content-addressed store of extracted document text, keyed by the SHA-256
+    of the uploaded bytes.
+
+    Two tiers, both LRU and size-bounded: an in-memory dict for hot documents
+    and a directory of text files that survives restarts. Disk recency is the
+    file mtime, refreshed on every hit. The memory tier counts each text's
+    in-memory size (sys.getsizeof: 1, 2 or 4 bytes per character depending
+    on the widest one), the disk tier its UTF-8 file size. Methods do
+    blocking file I/O and are thread-safe, so async callers can run them via
+    asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str = ".cache/extractions", max_memory_bytes: int = 64 * 1024 * 1024,
+                 max_disk_bytes: int = 1024 * 1024 * 1024):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, str]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # digest -> file size, oldest first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._load_disk_index()
+
+    @classmethod
+    def from_env(cls) -> "ExtractionCache":
+        return cls(
+            directory=os.getenv("EXTRACTION_CACHE_DIR", ".cache/extractions"),
+            max_memory_bytes=int(os.getenv("EXTRACTION_CACHE_MEMORY_MB", "64")) * 1024 * 1024,
+            max_disk_bytes=int(os.getenv("EXTRACTION_CACHE_DISK_MB", "1024")) * 1024 * 1024,
+        )
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest + ".txt")
+
+    def _load_disk_index(self):
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".txt"):
+                        st = os.stat(os.path.join(root, name))
+                        entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, digest, size in sorted(entries):
+            self._disk[digest] = size
+            self._disk_bytes += size
+
+    def _remember(self, digest: str, text: str):
+        """Adds to the memory tier. Caller holds the lock."""
+        size = sys.getsizeof(text)
+        if size > self.max_memory_bytes:
+            return
+        if digest in self._memory:
+            self._memory_bytes -= sys.getsizeof(self._memory.pop(digest))
+        self._memory[digest] = text
+        self._memory_bytes += size
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sys.getsizeof(evicted)
+
+    def get(self, digest: str) -> Optional[str]:
+        """Returns the cached text for `digest`, or None."""
+        with self._lock:
+            text = self._memory.get(digest)
+            if text is not None:
+                self._memory.move_to_end(digest)
+                self.stats["memory_hits"] += 1
+                return text
+            on_disk = digest in self._disk
+
+        if on_disk:
+            path = self._path(digest)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    text = f.read()
+                os.utime(path)
+            except OSError:
+                text = None
+            with self._lock:
+                if text is not None:
+                    if digest in self._disk:
+                        self._disk.move_to_end(digest)
+                    self._remember(digest, text)
+                    self.stats["disk_hits"] += 1
+                    return text
+                self._disk_bytes -= self._disk.pop(digest, 0)
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None
+
+    def put(self, digest: str, text: str):
+        """Stores `text` under `digest` in both tiers, evicting least recently used entries."""
+        with self._lock:
+            self._remember(digest, text)
+            if digest in self._disk:
+                return
+
+        data = text.encode("utf-8")
+        if len(data) > self.max_disk_bytes:
+            return
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if digest not in self._disk:
+                self._disk[digest] = len(data)
+                self._disk_bytes += len(data)
+            evict = []
+            while self._disk_bytes > self.max_disk_bytes and self._disk:
+                old, size = self._disk.popitem(last=False)
+                self._disk_bytes -= size
+                evict.append(old)
+        for old in evict:
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
@@ -0,0 +1,116 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def _trie_to_regex(node: Dict[str, dict]) -> str:
+    """Renders a character trie as a regex. Longer keywords are tried first."""
+    terminal = "" in node
+    branches = []
+    for char in sorted(k for k in node if k):
+        branches.append(re.escape(char) + _trie_to_regex(node[char]))
+
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if terminal:
+        # Greedy optional: prefer the longer keyword, fall back to this one
+        return "(?:" + body + ")?"
+    return body
+
+
+def build_keyword_regex(keywords: Iterable[str]) -> str:
+    """
+    Builds a single trie-shaped alternation for a set of literal keywords, so
+    that at any position the regex engine compares at most one character per
+    trie level instead of trying every keyword in turn.
+    """
+    root: Dict[str, dict] = {}
+    for keyword in keywords:
+        node = root
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _trie_to_regex(root)
+
+
+class KeywordMatcher:
+    """
+    Multi-pattern literal matcher compiled once into one regex.
+
+    `finditer` reports every (offset, keyword) occurrence in a single pass over
+    the text, including overlapping and nested keywords (e.g. both "market"
+    and "market share"), which gives the same answer as running a separate
+    substring search per keyword. With `word_boundary=True` only whole-word
+    occurrences are reported; `suffixes` (e.g. ("s", "es")) lets a whole
+    word also carry one of those endings, reported as the bare keyword.
+    """
+
+    def __init__(self, keywords: Iterable[str], word_boundary: bool = False, suffixes: Iterable[str] = ()):
+        self.keywords: List[str] = sorted({k for k in keywords if k})
+        if not self.keywords:
+            raise ValueError("KeywordMatcher needs at least one keyword")
+        self.word_boundary = word_boundary
+        self.suffixes: Tuple[str, ...] = tuple(sorted({s for s in suffixes if s}, key=len, reverse=True))
+        if self.suffixes and not word_boundary:
+            raise ValueError("suffixes only apply with word_boundary=True")
+        self.max_suffix_length = max(map(len, self.suffixes), default=0)
+
+        # Keywords that are proper prefixes of a longer keyword. The regex
+        # reports the longest keyword at each offset; these fill in the rest.
+        keyword_set = set(self.keywords)
+        self._prefixes: Dict[str, Tuple[str, ...]] = {
+            k: tuple(k[:i] for i in range(len(k) - 1, 0, -1) if k[:i] in keyword_set)
+            for k in self.keywords
+        }
+
+        body = build_keyword_regex(self.keywords)
+        # What may follow a whole-word keyword: an optional suffix, then a non-word character
+        tail = "(?:" + "|".join(map(re.escape, self.suffixes)) + ")?" if self.suffixes else ""
+        self._word_end = re.compile(tail + r"(?!\w)")
+        if word_boundary:
+            self.pattern = re.compile(r"(?<!\w)(" + body + ")" + tail + r"(?!\w)")
+        else:
+            self.pattern = re.compile("(" + body + ")")
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """Yields (offset, keyword) for every keyword occurrence in `text`."""
+        search = self.pattern.search
+        word_end = self._word_end.match
+        match = search(text)
+        while match is not None:
+            start = match.start()
+            keyword = match.group(1)
+            # Resume one character in, not at the match end, so keywords that
+            # overlap this one are still found. The engine skips ahead in C.
+            match = search(text, start + 1)
+            yield start, keyword
+            for prefix in self._prefixes[keyword]:
+                if self.word_boundary and word_end(text, start + len(prefix)) is None:
+                    continue
+                yield start, prefix
+
+    def finditer_spans(self, text: str) -> Iterator[Tuple[int, int, str]]:
+        """As finditer, with (start, end, keyword); `end` includes any matched suffix."""
+        search = self.pattern.search
+        word_end = self._word_end.match
+        match = search(text)
+        while match is not None:
+            start, end = match.span()
+            keyword = match.group(1)
+            match = search(text, start + 1)
+            yield start, end, keyword
+            for prefix in self._prefixes[keyword]:
+                end = start + len(prefix)
+                if self.word_boundary:
+                    tail = word_end(text, end)
+                    if tail is None:
+                        continue
+                    end = tail.end()
+                yield start, end, prefix
+
+    def findall(self, text: str) -> List[str]:
+        """Returns the distinct keywords present in `text`, in order of first occurrence."""
+        seen = {}
+        for _, keyword in self.finditer(text):
+            seen.setdefault(keyword, None)
+        return list(seen)
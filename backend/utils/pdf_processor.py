@@ -1,15 +1,146 @@
 import io
+import os
+import asyncio
+import signal
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple, Union
 from pypdf import PdfReader
 
+PDFSource = Union[bytes, str]  # raw bytes or a path to a file on disk
+
+def _open_reader(source: PDFSource) -> PdfReader:
+    return PdfReader(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+
 def extract_text_from_pdf(file_bytes: bytes) -> str:
     """
     Extracts text from a PDF file provided as bytes.
     """
     try:
         reader = PdfReader(io.BytesIO(file_bytes))
-        text = ""
-        for page in reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        return "\n".join(page.extract_text() for page in reader.pages).strip()
     except Exception as e:
         return f"Error extracting text: {str(e)}"
+
+# --- Process pool extraction ---
+
+class PDFPoolBusy(Exception):
+    """Raised when the extraction pool already has its maximum number of jobs queued."""
+
+class PDFExtractionError(Exception):
+    """Raised when a job exceeds its time or memory limit."""
+
+def _limit_worker_memory(memory_limit_mb: int):
+    """Pool initializer: caps each worker's address space so one hostile PDF can't OOM the host."""
+    if memory_limit_mb:
+        import resource
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+def _on_alarm(signum, frame):
+    raise TimeoutError("PDF extraction timed out")
+
+def _extract_pages_job(source: PDFSource, start: int, end: Optional[int], timeout: float) -> Tuple[List[str], int]:
+    """
+    Runs in a pool worker. Extracts pages [start, end) (end=None: to the last
+    page) and returns their text with the document's total page count. The
+    time limit is enforced inside the worker with SIGALRM.
+    """
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        reader = _open_reader(source)
+        total = len(reader.pages)
+        pages = [reader.pages[i].extract_text() for i in range(start, min(end if end is not None else total, total))]
+        return pages, total
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+class PDFExtractionPool:
+    """
+    Bounded process pool for CPU-bound pypdf extraction, keeping parsing off
+    the event loop. Large documents are split into page chunks extracted in
+    parallel. At most `max_pending` documents may be queued or running; past
+    that, `extract` raises PDFPoolBusy instead of growing an unbounded queue.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_pending: Optional[int] = None,
+                 job_timeout: float = 60.0, memory_limit_mb: int = 1024, pages_per_chunk: int = 50):
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.max_pending = max_pending or self.max_workers * 4
+        self.job_timeout = job_timeout
+        self.pages_per_chunk = pages_per_chunk
+        self.memory_limit_mb = memory_limit_mb
+        self.pending = 0
+        self._executor = self._new_executor()
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_limit_worker_memory,
+            initargs=(self.memory_limit_mb,),
+        )
+
+    @classmethod
+    def from_env(cls) -> "PDFExtractionPool":
+        return cls(
+            max_workers=int(os.getenv("PDF_WORKERS", "0")) or None,
+            max_pending=int(os.getenv("PDF_MAX_PENDING", "0")) or None,
+            job_timeout=float(os.getenv("PDF_JOB_TIMEOUT", "60")),
+            memory_limit_mb=int(os.getenv("PDF_MEMORY_LIMIT_MB", "1024")),
+            pages_per_chunk=int(os.getenv("PDF_PAGES_PER_CHUNK", "50")),
+        )
+
+    async def _run(self, source: PDFSource, start: int, end: Optional[int]) -> Tuple[List[str], int]:
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._executor, _extract_pages_job, source, start, end, self.job_timeout)
+        try:
+            # The worker enforces the limit itself; this is a backstop
+            return await asyncio.wait_for(future, self.job_timeout + 5)
+        except (TimeoutError, asyncio.TimeoutError):
+            raise PDFExtractionError(f"PDF extraction exceeded {self.job_timeout:g}s")
+        except MemoryError:
+            raise PDFExtractionError("PDF extraction exceeded the worker memory limit")
+        except BrokenProcessPool:
+            # A worker died hard (e.g. killed by the OS); replace the pool
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = self._new_executor()
+            raise PDFExtractionError("PDF extraction worker crashed")
+
+    async def extract(self, source: PDFSource) -> str:
+        """
+        Extracts all text from a PDF given as bytes or a file path. Parse
+        errors are returned as an "Error extracting text" string, matching
+        extract_text_from_pdf; limit violations raise PDFExtractionError.
+        """
+        text, _ = await self.extract_document(source)
+        return text
+
+    async def extract_document(self, source: PDFSource) -> Tuple[str, int]:
+        """Like extract, but also returns the page count (0 when parsing failed)."""
+        if self.pending >= self.max_pending:
+            raise PDFPoolBusy(f"PDF extraction queue is full ({self.max_pending} jobs)")
+        self.pending += 1
+        try:
+            # The first chunk also tells us the page count, so small documents
+            # are parsed exactly once.
+            first, total = await self._run(source, 0, self.pages_per_chunk)
+            chunks = [first]
+            if total > self.pages_per_chunk:
+                rest = await asyncio.gather(*(
+                    self._run(source, start, start + self.pages_per_chunk)
+                    for start in range(self.pages_per_chunk, total, self.pages_per_chunk)
+                ))
+                chunks.extend(pages for pages, _ in rest)
+            return "\n".join(text for pages in chunks for text in pages).strip(), total
+        except PDFExtractionError:
+            raise
+        except Exception as e:
+            return f"Error extracting text: {str(e)}", 0
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
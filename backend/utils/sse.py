@@ -0,0 +1,127 @@
+import asyncio
+import json
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+
+def format_sse(event_id: str, event: str, data: Any) -> str:
+    """Serializes one Server-Sent Event frame."""
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def parse_event_id(event_id: Optional[str]) -> Tuple[Optional[str], int]:
+    """Splits a "<stream_id>:<seq>" event id; returns (None, -1) if malformed."""
+    if not event_id or ":" not in event_id:
+        return None, -1
+    stream_id, _, seq = event_id.rpartition(":")
+    return (stream_id, int(seq)) if seq.isdigit() else (None, -1)
+
+
+class StreamRun:
+    """
+    One chat run being produced in the background. Events are numbered and
+    kept in a bounded replay buffer, so a client that reconnects with
+    Last-Event-ID picks up where it left off instead of restarting the
+    analysis. A consumer that falls further behind than the buffer gets a
+    "gap" event and continues from the oldest event still held.
+    """
+
+    def __init__(self, stream_id: str, buffer_size: int):
+        self.stream_id = stream_id
+        self.buffer: "deque[Tuple[int, str, Any]]" = deque(maxlen=buffer_size)
+        self.next_seq = 0
+        self.done = False
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    async def _publish(self, event: str, data: Any):
+        async with self._changed:
+            self.buffer.append((self.next_seq, event, data))
+            self.next_seq += 1
+            self._changed.notify_all()
+
+    async def produce(self, events: AsyncIterator[Dict[str, Any]]):
+        """Drains an orchestrator event stream into the buffer."""
+        try:
+            async for event in events:
+                await self._publish(event["type"], event)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await self._publish("error", {"type": "error", "content": str(e)})
+        finally:
+            async with self._changed:
+                self.done = True
+                self.finished_at = time.monotonic()
+                self._changed.notify_all()
+
+    async def subscribe(self, after: int = -1, keepalive: float = 15.0) -> AsyncIterator[str]:
+        """Yields SSE frames for events numbered after `after`, until the run ends."""
+        seq = after + 1
+        while True:
+            async with self._changed:
+                while seq >= self.next_seq and not self.done:
+                    try:
+                        await asyncio.wait_for(self._changed.wait(), keepalive)
+                    except asyncio.TimeoutError:
+                        break
+                pending = [item for item in self.buffer if item[0] >= seq]
+                oldest = self.buffer[0][0] if self.buffer else self.next_seq
+                done = self.done
+
+            if seq < oldest:
+                yield format_sse(f"{self.stream_id}:{oldest - 1}", "gap", {"type": "gap", "missed": oldest - seq})
+                seq = oldest
+            if not pending and not done:
+                # Comment frame keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+            for item_seq, event, data in pending:
+                yield format_sse(f"{self.stream_id}:{item_seq}", event, data)
+                seq = item_seq + 1
+            if done:
+                return
+
+
+class StreamRegistry:
+    """
+    Tracks in-flight and recently finished StreamRuns by id. Finished runs are
+    kept for `retain_seconds` so late reconnects can still replay them; at
+    most `max_streams` runs are held, oldest evicted first.
+    """
+
+    def __init__(self, max_streams: int = 1000, buffer_size: int = 256, retain_seconds: float = 120.0):
+        self.max_streams = max_streams
+        self.buffer_size = buffer_size
+        self.retain_seconds = retain_seconds
+        self._runs: "OrderedDict[str, StreamRun]" = OrderedDict()
+
+    def _evict(self):
+        cutoff = time.monotonic() - self.retain_seconds
+        for stream_id, run in list(self._runs.items()):
+            if run.done and run.finished_at < cutoff:
+                del self._runs[stream_id]
+        while len(self._runs) > self.max_streams:
+            _, run = self._runs.popitem(last=False)
+            if run.task and not run.task.done():
+                run.task.cancel()
+
+    def start(self, events: AsyncIterator[Dict[str, Any]]) -> StreamRun:
+        """Starts producing `events` in a background task and registers the run."""
+        self._evict()
+        run = StreamRun(uuid.uuid4().hex, self.buffer_size)
+        run.task = asyncio.create_task(run.produce(events))
+        self._runs[run.stream_id] = run
+        return run
+
+    def get(self, stream_id: Optional[str]) -> Optional[StreamRun]:
+        self._evict()
+        return self._runs.get(stream_id) if stream_id else None
+
+    def shutdown(self):
+        for run in self._runs.values():
+            if run.task and not run.task.done():
+                run.task.cancel()
+        self._runs.clear()
@@ -0,0 +1,214 @@
+import hashlib
+import json
+import os
+import tempfile
+from typing import Dict, NamedTuple, Optional, Sequence
+
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.requests import Request
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds the configured maximum size."""
+
+
+class MalformedUpload(ValueError):
+    """Raised when a multipart/form-data body can't be parsed."""
+
+
+class SpooledUpload(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
+class MultipartUpload(NamedTuple):
+    file: Optional[SpooledUpload]  # None if the form had no file part
+    filename: str
+    fields: Dict[str, str]
+
+
+class _MultipartSpooler:
+    """python-multipart callbacks: the file part goes to disk, other fields to memory."""
+
+    def __init__(self, directory: str, max_bytes: int, file_field: str, max_field_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.file_field = file_field
+        self.max_field_bytes = max_field_bytes
+        self.fields: Dict[str, str] = {}
+        self.filename = ""
+        self.path: Optional[str] = None
+        self.out = None
+        self.size = 0
+        self.digest = hashlib.sha256()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+        self._name = ""
+        self._data: Optional[bytearray] = None  # current non-file field
+        self._writing = False  # current part is the spooled file
+
+    def callbacks(self):
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._disposition = b""
+        self._data = None
+        self._writing = False
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        if b"name" not in options:
+            raise MalformedUpload('Content-Disposition is missing the field "name"')
+        self._name = options[b"name"].decode("utf-8", "replace")
+        if b"filename" in options and self._name == self.file_field and self.out is None:
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            os.makedirs(self.directory, exist_ok=True)
+            fd, self.path = tempfile.mkstemp(prefix="upload-", suffix=".bin", dir=self.directory)
+            self.out = os.fdopen(fd, "wb")
+            self._writing = True
+        elif b"filename" not in options:
+            self._data = bytearray()
+        # Any other file part is read past and discarded
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._writing:
+            self.size += end - start
+            if self.size > self.max_bytes:
+                raise UploadTooLarge(f"Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit")
+            chunk = data[start:end]
+            self.digest.update(chunk)
+            self.out.write(chunk)
+        elif self._data is not None:
+            if len(self._data) + end - start > self.max_field_bytes:
+                raise MalformedUpload(f"Form field {self._name!r} exceeds {self.max_field_bytes} bytes")
+            self._data += data[start:end]
+
+    def on_part_end(self):
+        if self._writing:
+            self.out.close()
+            self._writing = False
+        elif self._data is not None:
+            self.fields[self._name] = self._data.decode("utf-8", "replace")
+            self._data = None
+
+
+async def spool_multipart(request: Request, directory: str, max_bytes: int, file_field: str = "file",
+                          max_field_bytes: int = 64 * 1024) -> MultipartUpload:
+    """
+    Parses a multipart/form-data body as it streams in. The `file_field`
+    part is written straight to a temp file in `directory`, hashed and
+    size-checked on the way, so the upload lands on disk exactly once and
+    memory holds one network chunk at a time; other text fields are
+    collected in memory. Raises UploadTooLarge past `max_bytes` and
+    MalformedUpload for a body that isn't valid multipart, removing any
+    partial file. The caller owns the returned file and must delete it.
+    """
+    _, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if not boundary:
+        raise MalformedUpload("Expected a multipart/form-data body with a boundary")
+    spooler = _MultipartSpooler(directory, max_bytes, file_field, max_field_bytes)
+    try:
+        try:
+            parser = MultipartParser(boundary, spooler.callbacks())
+            async for chunk in request.stream():
+                parser.write(chunk)
+            parser.finalize()
+        except FormParserError as e:
+            raise MalformedUpload(str(e)) from e
+        if spooler.out is not None and not spooler.out.closed:
+            raise MalformedUpload("Multipart body ended inside the file part")
+    except BaseException:
+        if spooler.out is not None:
+            spooler.out.close()
+            os.remove(spooler.path)
+        raise
+    upload = SpooledUpload(spooler.path, spooler.size, spooler.digest.hexdigest()) if spooler.path else None
+    return MultipartUpload(upload, spooler.filename, spooler.fields)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that rejects oversized request bodies on upload routes
+    before they are parsed: immediately from Content-Length when the client
+    sends one, otherwise as soon as the streamed (e.g. chunked) body passes
+    the limit. In that case the app is told the client disconnected, so it
+    stops reading, and the middleware sends the 413 itself in place of
+    whatever the app makes of the cut-off body. `framing_bytes` of slack
+    cover the multipart headers around the file.
+    """
+
+    def __init__(self, app, max_bytes: int, paths: Sequence[str] = ("/api/upload",), framing_bytes: int = 64 * 1024):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.body_limit = max_bytes + framing_bytes
+        self.paths = tuple(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > self.body_limit:
+                return await self._reject(send)
+
+        received = 0
+        too_large = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, too_large
+            if too_large:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.body_limit:
+                    too_large = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            if too_large and not response_started:
+                return  # replaced by the 413 below
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # The app may fail on the truncated body; that's expected here
+            if not too_large or response_started:
+                raise
+        if too_large and not response_started:
+            await self._reject(send)
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": f"Upload exceeds the {self.max_bytes // (1024 * 1024)} MB limit"}).encode()
+        await send({"type": "http.response.start", "status": 413,
+                    "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]})
+        await send({"type": "http.response.body", "body": body})
@@ -21,6 +21,8 @@ export const ChatInterface = ({ onLog, onAgentUpdate, onResponse }) => {
   const [isListening, setIsListening] = useState(false);
   const [isUploading, setIsUploading] = useState(false);
   
+  // Ties uploads to this chat so the backend can search them server-side
+  const sessionId = useRef(crypto.randomUUID());
   const ws = useRef(null);
   const messagesEndRef = useRef(null);
   const fileInputRef = useRef(null);
@@ -28,7 +30,7 @@ export const ChatInterface = ({ onLog, onAgentUpdate, onResponse }) => {
 
   useEffect(() => {
     // Initialize WebSocket connection
-    ws.current = new WebSocket(config.endpoints.chat);
+    ws.current = new WebSocket(`${config.endpoints.chat}?session_id=${sessionId.current}`);
 
     ws.current.onopen = () => {
       console.log('Connected to WebSocket');
@@ -38,10 +40,7 @@ export const ChatInterface = ({ onLog, onAgentUpdate, onResponse }) => {
     ws.current.onmessage = (event) => {
       const data = JSON.parse(event.data);
       
-      if (data.type === 'log') {
-        setSystemStatus(data.content);
-        if (onLog) onLog(data.content);
-      } else if (data.type === 'response') {
+      if (data.type === 'response') {
         const response = data.data;
         const newMessage = {
           id: response.id || Date.now(),
@@ -67,6 +66,10 @@ export const ChatInterface = ({ onLog, onAgentUpdate, onResponse }) => {
         if (onResponse) {
           onResponse(response);
         }
+      } else if (data.content) {
+        // Progress events (log, route, agent, score) arrive as work completes
+        setSystemStatus(data.content);
+        if (onLog) onLog(data.content);
       }
     };
 
@@ -163,6 +166,7 @@ export const ChatInterface = ({ onLog, onAgentUpdate, onResponse }) => {
 
     const formData = new FormData();
     formData.append('file', file);
+    formData.append('session_id', sessionId.current);
 
     try {
       const response = await fetch(config.endpoints.upload, {